@@ -6,10 +6,13 @@ from flask_restful import Api
 from flask_security import Security, SQLAlchemyUserDatastore
 from flask_security.utils import hash_password
 
-from application.config import LocalDevConfig
+from application.config import get_config
 from application.data import models
-from application.data.database import db
+from application.data.cache_events import init_cache_events
+from application.data.database import db, init_sqlite_pragmas
 from application.data.models import User, Role
+from application.metrics import init_metrics
+from application.representations import output_json
 from application import cache
 
 migrate = Migrate()
@@ -18,16 +21,21 @@ mail = Mail()
 
 def create_app():
     app = Flask(__name__)
-    app.config.from_object(LocalDevConfig)
+    app.config.from_object(get_config())
     db.init_app(app)
+    with app.app_context():
+        init_sqlite_pragmas(app)
     cors.init_app(app, origins=["*"], supports_credentials=True)
     migrate.init_app(app, db)
     mail.init_app(app)
     api = Api(app)
+    api.representation('application/json')(output_json)
     datastore = SQLAlchemyUserDatastore(db, User, Role)
     app.security = Security(app, datastore)
     app.app_context().push()
     cache.init_app(app)
+    init_cache_events()
+    init_metrics(app)
     app.app_context().push()
     return app, api, cache
 
@@ -36,12 +44,17 @@ app, api, cache = create_app()
 
 # Importing routes
 from application.routes import *
+from application.commands import *
 from application.resources.auth import UserRegisterResource, UserProfileResource
-from application.resources.admin_resources import ChapterResource, QuestionResource, QuizResource, SubjectResource, UserDeactivateResource, UserListResource
+from application.resources.admin_resources import ChapterResource, QuestionResource, QuizCatalogResource, QuizResource, SubjectResource, UserDeactivateResource, UserListResource
 from application.resources.admin_resources.QuizActivationResource import QuizActivationResource
 from application.resources.quiz_attempt import (
+    ExportAttemptsDownloadResource,
     ExportUserAttemptsResource,
+    QuizAttemptDraftResource,
     QuizAttemptResource,
+    QuizAttemptSubmissionResource,
+    QuizAttemptsBatchResource,
     QuizAttemptsResource,
     QuizAttemptsStatsResource,
     UserQuizAttemptsResource,
@@ -55,15 +68,20 @@ api.add_resource(UserDeactivateResource, '/api/users/<int:user_id>/deactivate')
 api.add_resource(SubjectResource, '/api/subjects', '/api/subjects/<int:subject_id>')
 api.add_resource(ChapterResource, '/api/subjects/<int:subject_id>/chapters', '/api/subjects/<int:subject_id>/chapters/<int:c_id>')
 api.add_resource(QuizResource, '/api/quizzes', '/api/quizzes/<int:quiz_id>')
+api.add_resource(QuizCatalogResource, '/api/quizzes/catalog')
 api.add_resource(QuizActivationResource, '/api/quizzes/<int:quiz_id>/toggle')
 api.add_resource(QuestionResource, '/api/quizzes/<int:quiz_id>/questions', '/api/quizzes/<int:quiz_id>/questions/<int:question_id>')
 
 api.add_resource(QuizAttemptsResource, '/api/quiz-attempts')
+api.add_resource(QuizAttemptsBatchResource, '/api/quiz-attempts/batch')
+api.add_resource(QuizAttemptDraftResource, '/api/quiz-attempts/draft/<int:quiz_id>')
+api.add_resource(QuizAttemptSubmissionResource, '/api/quiz-attempts/submissions/<string:submission_id>')
 api.add_resource(QuizAttemptResource, '/api/quiz-attempts/<int:attempt_id>')
 api.add_resource(UserQuizAttemptsResource, '/api/users/<int:user_id>/quiz-attempts')
 api.add_resource(UserStatsResource, '/api/users/<int:user_id>/stats')
 api.add_resource(QuizAttemptsStatsResource, '/api/quiz-attempts/stats')
 api.add_resource(ExportUserAttemptsResource, '/api/quiz-attempts/export')
+api.add_resource(ExportAttemptsDownloadResource, '/api/quiz-attempts/export.<any(csv, ndjson):export_format>')
 
 app.app_context().push()
 
@@ -0,0 +1,14 @@
+import click
+from flask import current_app as app
+
+from application.data.database import db
+from application.data.subject_stats import rebuild_subject_stats
+
+
+@app.cli.command('rebuild-subject-stats')
+@click.option('--subject-id', type=int, default=None, help="Only rebuild this subject")
+def rebuild_subject_stats_command(subject_id):
+    """Backfill subject_attempt_stats from quiz_attempts."""
+    count = rebuild_subject_stats(subject_id)
+    db.session.commit()
+    click.echo(f"Rebuilt attempt stats for {count} subject(s)")
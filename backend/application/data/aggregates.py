@@ -0,0 +1,115 @@
+from sqlalchemy import func, select
+
+from application.data.models import Chapter, Quiz, QuizAttempt, Subject, SubjectAttemptStats, User, db
+
+
+def _attempts_with_subject(*columns):
+    """Select columns over quiz_attempts joined through quizzes and chapters to subjects."""
+    return (
+        select(*columns)
+        .select_from(QuizAttempt)
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+    )
+
+
+def subject_totals_query(subject_id=None):
+    """
+    GROUP BY subject: (subject_id, attempts, top percentage, sum of percentage,
+    sum of squared percentage). Returned as a select so it can feed INSERT .. SELECT.
+    """
+    query = _attempts_with_subject(
+        Chapter.subject_id,
+        func.count(QuizAttempt.id),
+        func.max(QuizAttempt.percentage),
+        func.sum(QuizAttempt.percentage),
+        func.sum(QuizAttempt.percentage * QuizAttempt.percentage)
+    ).group_by(Chapter.subject_id)
+    if subject_id is not None:
+        query = query.where(Chapter.subject_id == subject_id)
+    return query
+
+
+def get_subject_stats():
+    """
+    Fetch (subject name, attempts, top percentage) for every subject with attempts,
+    read from the materialized per-subject aggregate.
+    """
+    return [tuple(row) for row in db.session.execute(
+        select(Subject.name, SubjectAttemptStats.attempt_count, SubjectAttemptStats.max_percentage)
+        .join(SubjectAttemptStats, SubjectAttemptStats.subject_id == Subject.id)
+    )]
+
+
+def get_user_totals(user_id, since=None):
+    """Fetch (attempts, total score, max possible score) for a user."""
+    query = select(
+        func.count(QuizAttempt.id),
+        func.coalesce(func.sum(QuizAttempt.total_score), 0),
+        func.coalesce(func.sum(QuizAttempt.max_score), 0)
+    ).where(QuizAttempt.user_id == user_id)
+    if since is not None:
+        query = query.where(QuizAttempt.timestamp >= since)
+    return tuple(db.session.execute(query).one())
+
+
+def get_user_subject_totals(user_id, since=None):
+    """
+    Fetch (subject name, attempts, total score, max possible score, average
+    percentage, top percentage) per subject for a user.
+    """
+    query = (
+        _attempts_with_subject(
+            Subject.name,
+            func.count(QuizAttempt.id),
+            func.sum(QuizAttempt.total_score),
+            func.sum(QuizAttempt.max_score),
+            func.avg(QuizAttempt.percentage),
+            func.max(QuizAttempt.percentage)
+        )
+        .where(QuizAttempt.user_id == user_id)
+        .group_by(Subject.id, Subject.name)
+        .order_by(Subject.name)
+    )
+    if since is not None:
+        query = query.where(QuizAttempt.timestamp >= since)
+    return [tuple(row) for row in db.session.execute(query)]
+
+
+def iter_user_subject_totals(since, batch_size=1000):
+    """
+    Yield (user id, email, full name, subject name, attempts, total score, max
+    possible score) for every active user, ordered by user. Attempts since
+    `since` are grouped per (user, subject) in one pass; users without any
+    come back once with the subject columns set to None.
+    """
+    per_subject = (
+        _attempts_with_subject(
+            QuizAttempt.user_id,
+            Subject.name.label('subject_name'),
+            func.count(QuizAttempt.id).label('attempts'),
+            func.sum(QuizAttempt.total_score).label('total_score'),
+            func.sum(QuizAttempt.max_score).label('max_score')
+        )
+        .where(QuizAttempt.timestamp >= since)
+        .group_by(QuizAttempt.user_id, Subject.id, Subject.name)
+        .subquery()
+    )
+    query = (
+        select(
+            User.id,
+            User.email,
+            User.full_name,
+            per_subject.c.subject_name,
+            per_subject.c.attempts,
+            per_subject.c.total_score,
+            per_subject.c.max_score
+        )
+        .outerjoin(per_subject, per_subject.c.user_id == User.id)
+        .where(User.active == True)
+        .order_by(User.id, per_subject.c.subject_name)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.session.execute(query):
+        yield tuple(row)
@@ -0,0 +1,126 @@
+from array import array
+from collections import namedtuple
+
+import numpy as np
+from sqlalchemy import select
+
+from application import cache
+from application.data.caching import get_tag_versions
+from application.data.models import Chapter, Question, Quiz, db
+
+# question_ids is an array('q') and correct_options a bytes object, in question id order;
+# time_duration is the quiz length in minutes
+AnswerKey = namedtuple('AnswerKey', ['quiz_id', 'subject_id', 'time_duration', 'question_ids', 'correct_options'])
+
+# quiz_id -> (tag versions, AnswerKey), checked against the shared tag versions on every read
+_local_keys = {}
+
+
+def _answer_key_tags(quiz_id):
+    # Question writes, and quiz writes (a chapter move changes the subject)
+    return [f'quiz:{quiz_id}:questions', f'quiz:{quiz_id}']
+
+
+def _load_answer_key(quiz_id):
+    quiz = db.session.execute(
+        select(Chapter.subject_id, Quiz.time_duration).join(Quiz, Quiz.chapter_id == Chapter.id).where(Quiz.id == quiz_id)
+    ).first()
+    if quiz is None:
+        return None
+
+    rows = db.session.execute(
+        select(Question.id, Question.correct_option).where(Question.quiz_id == quiz_id).order_by(Question.id)
+    ).all()
+    return AnswerKey(
+        quiz_id,
+        quiz.subject_id,
+        quiz.time_duration,
+        array('q', [question_id for question_id, _ in rows]),
+        bytes(correct_option for _, correct_option in rows)
+    )
+
+
+def get_answer_key(quiz_id):
+    """
+    Compact answer key used to score a submission, or None if the quiz doesn't
+    exist. Served from process memory, then Redis, then the questions table,
+    and versioned by the quiz's cache tags so question edits are seen at once.
+    """
+    versions = get_tag_versions(_answer_key_tags(quiz_id))
+    if versions is None:
+        # No cache to validate against, so read straight from the database
+        return _load_answer_key(quiz_id)
+    versions = tuple(versions)
+
+    local = _local_keys.get(quiz_id)
+    if local and local[0] == versions:
+        return local[1]
+
+    redis_key = f"answer_key:v2:{quiz_id}:{':'.join(versions)}"
+    try:
+        blob = cache.get(redis_key)
+    except Exception:
+        blob = None
+
+    if blob is not None:
+        subject_id, time_duration, question_ids, correct_options = blob
+        answer_key = AnswerKey(quiz_id, subject_id, time_duration, array('q', question_ids), correct_options)
+    else:
+        answer_key = _load_answer_key(quiz_id)
+        if answer_key is None:
+            return None
+        try:
+            cache.set(redis_key, (
+                answer_key.subject_id,
+                answer_key.time_duration,
+                answer_key.question_ids.tobytes(),
+                answer_key.correct_options
+            ))
+        except Exception:
+            pass
+
+    _local_keys[quiz_id] = (versions, answer_key)
+    return answer_key
+
+
+def score_answers(answer_key, answers):
+    """Number of correct answers in answers ({"question_id": selected_option})."""
+    score = 0
+    for question_id, correct_option in zip(answer_key.question_ids, answer_key.correct_options):
+        # User's answer for the current question (handle string keys from JSON)
+        answer = answers.get(str(question_id))
+        if answer is None:
+            continue
+        try:
+            if int(answer) == correct_option:
+                score += 1
+        except (ValueError, TypeError):
+            # Ignore if the answer is not a valid integer
+            continue
+    return score
+
+
+def _as_option(answer):
+    # 0 never matches a correct option (1-4), so blanks and junk score nothing
+    try:
+        option = int(answer)
+    except (ValueError, TypeError):
+        return 0
+    return option if 0 < option < 256 else 0
+
+
+def score_answer_sheets(answer_key, answer_sheets):
+    """
+    Score many submissions against one answer key. answer_sheets is a list of
+    {"question_id": selected_option} dicts; returns a NumPy array of scores in
+    the same order. The sheets are packed into an N x questions uint8 matrix
+    and compared with the key in one vectorized step.
+    """
+    keys = [str(question_id) for question_id in answer_key.question_ids]
+    correct = np.frombuffer(answer_key.correct_options, dtype=np.uint8)
+    sheets = np.fromiter(
+        (_as_option(answers.get(key)) for answers in answer_sheets for key in keys),
+        dtype=np.uint8,
+        count=len(answer_sheets) * len(keys)
+    ).reshape(len(answer_sheets), len(keys))
+    return (sheets == correct).sum(axis=1)
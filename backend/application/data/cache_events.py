@@ -0,0 +1,96 @@
+from sqlalchemy import event, inspect, select
+
+from application.data.caching import invalidate
+from application.data.database import db
+from application.data.models import Chapter, Question, Quiz, QuizAttempt, Role, Subject, User
+
+PENDING_TAGS = 'cache_tags'
+
+
+def tags_for(instance):
+    """Cache tags a changed model instance makes stale."""
+    if isinstance(instance, QuizAttempt):
+        return ['attempts', f'attempt:{instance.id}', f'attempts:user:{instance.user_id}']
+    if isinstance(instance, Question):
+        return ['questions', f'quiz:{instance.quiz_id}:questions']
+    if isinstance(instance, Quiz):
+        return ['quizzes', f'quiz:{instance.id}']
+    if isinstance(instance, Chapter):
+        return ['chapters', f'chapter:{instance.id}', f'subject:{instance.subject_id}']
+    if isinstance(instance, Subject):
+        return ['subjects', f'subject:{instance.id}']
+    if isinstance(instance, User):
+        return ['users', f'user:{instance.id}']
+    if isinstance(instance, Role):
+        return ['users']
+    return []
+
+
+def mark_stale(session, *tags):
+    """
+    Queue tags for eviction when the session commits. For writes that skip
+    the unit of work (bulk inserts, Core UPDATEs) and so never reach after_flush.
+    """
+    session.info.setdefault(PENDING_TAGS, set()).update(tags)
+
+
+def _values(instance, attribute):
+    """An attribute's current and pre-flush values, so a moved row stales both parents."""
+    history = inspect(instance).attrs[attribute].history
+    return {value for value in (*history.sum(), *history.deleted) if value is not None}
+
+
+def subject_tree_tags(session, instances):
+    """
+    subject:<id>:tree for every subject whose chapter/quiz/question tree the
+    changed instances touch. Quizzes and questions only know their parent,
+    so their subjects are looked up, at most two queries per flush.
+    """
+    subject_ids, chapter_ids, quiz_ids = set(), set(), set()
+    for instance in instances:
+        if isinstance(instance, Subject):
+            subject_ids.add(instance.id)
+        elif isinstance(instance, Chapter):
+            subject_ids.update(_values(instance, 'subject_id'))
+        elif isinstance(instance, Quiz):
+            chapter_ids.update(_values(instance, 'chapter_id'))
+        elif isinstance(instance, Question):
+            quiz_ids.update(_values(instance, 'quiz_id'))
+
+    if chapter_ids:
+        subject_ids.update(session.scalars(select(Chapter.subject_id).where(Chapter.id.in_(chapter_ids))))
+    if quiz_ids:
+        subject_ids.update(session.scalars(
+            select(Chapter.subject_id).join(Quiz, Quiz.chapter_id == Chapter.id).where(Quiz.id.in_(quiz_ids))
+        ))
+    return [f'subject:{subject_id}:tree' for subject_id in subject_ids]
+
+
+def _collect_tags(session, flush_context):
+    pending = session.info.setdefault(PENDING_TAGS, set())
+    changed = [*session.new, *session.deleted]
+    changed.extend(instance for instance in session.dirty if session.is_modified(instance))
+    for instance in changed:
+        pending.update(tags_for(instance))
+    pending.update(subject_tree_tags(session, changed))
+
+
+def _evict_on_commit(session):
+    tags = session.info.pop(PENDING_TAGS, None)
+    if tags:
+        invalidate(*tags)
+
+
+def _discard_on_rollback(session):
+    session.info.pop(PENDING_TAGS, None)
+
+
+def init_cache_events():
+    """Evict the cache tags touched by each transaction once it commits."""
+    for name, listener in (
+        ('after_flush', _collect_tags),
+        ('after_commit', _evict_on_commit),
+        ('after_rollback', _discard_on_rollback),
+    ):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -0,0 +1,89 @@
+import functools
+import hashlib
+import logging
+import uuid
+
+from application import cache
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = 'tag:'
+MEMO_PREFIX = 'memo:'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def get_tag_versions(tags):
+    """
+    Current version token of each tag. A tag that has never been bumped (or
+    was evicted) gets a fresh random token, so entries cached under an older
+    token can never be served again.
+    """
+    keys = [TAG_PREFIX + tag for tag in tags]
+    try:
+        versions = list(cache.get_many(*keys)) if keys else []
+        for i, version in enumerate(versions):
+            if version is None:
+                cache.add(keys[i], _new_version(), timeout=0)
+                versions[i] = cache.get(keys[i])
+        if None in versions:
+            # A backend that doesn't keep values (NullCache) can't version anything
+            return None
+        return versions
+    except Exception:
+        logger.warning("Cache unavailable while reading tag versions", exc_info=True)
+        return None
+
+
+def invalidate(*tags):
+    """Bump each tag's version, which evicts every entry cached under it."""
+    try:
+        cache.set_many({TAG_PREFIX + tag: _new_version() for tag in tags}, timeout=0)
+    except Exception:
+        logger.warning("Cache unavailable while invalidating %s", tags, exc_info=True)
+
+
+def _make_key(fn, args, kwargs, versions):
+    raw = repr((args, sorted(kwargs.items()), versions))
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"{MEMO_PREFIX}{fn.__module__}.{fn.__qualname__}:{digest}"
+
+
+def memoized(tags, timeout=None):
+    """
+    Cache a function's return value keyed on its arguments and on the versions
+    of the tags it depends on. tags(*args, **kwargs) returns the tag names, so
+    reads for different users or ids never share an entry. The function must
+    return plain serializable data (tuples, dicts), never ORM instances.
+    If the cache is down the function just runs uncached. timeout=None uses
+    CACHE_DEFAULT_TIMEOUT.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = get_tag_versions(tags(*args, **kwargs))
+            if versions is None:
+                return fn(*args, **kwargs)
+
+            key = _make_key(fn, args, kwargs, versions)
+            try:
+                hit = cache.get(key)
+            except Exception:
+                logger.warning("Cache unavailable while reading %s", key, exc_info=True)
+                hit = None
+            if hit is not None:
+                # Stored wrapped so a cached None is still a hit
+                return hit[0]
+
+            value = fn(*args, **kwargs)
+            try:
+                cache.set(key, (value,), timeout=timeout)
+            except Exception:
+                logger.warning("Cache unavailable while writing %s", key, exc_info=True)
+            return value
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
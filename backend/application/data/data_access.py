@@ -1,48 +1,142 @@
-from sqlalchemy.orm import joinedload, selectinload
+import sys
 
-from application.data.models import Chapter, QuizAttempt, Role, roles_users, User, Quiz, db
-from application import cache
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import selectinload
 
+from application.data.caching import memoized
+from application.data.models import Chapter, QuizAttempt, Role, roles_users, Subject, User, Quiz, db, search_key
 
-@cache.cached(timeout=60, query_string=True)
+# Reads are cached as plain dicts/tuples keyed on their arguments. Committed
+# writes evict the tags listed here (see application.data.cache_events).
+
+
+def _attempt_columns():
+    return (
+        select(
+            QuizAttempt.id,
+            QuizAttempt.user_id,
+            QuizAttempt.quiz_id,
+            QuizAttempt.timestamp,
+            QuizAttempt.total_score,
+            QuizAttempt.max_score,
+            QuizAttempt.percentage,
+            User.email.label('user_name'),
+            Quiz.title.label('quiz_title')
+        )
+        .join(User, QuizAttempt.user_id == User.id)
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+    )
+
+
+def _attempt_dict(row):
+    return {
+        'id': row.id,
+        'user_id': row.user_id,
+        'quiz_id': row.quiz_id,
+        'timestamp': row.timestamp,
+        'total_score': row.total_score,
+        'max_score': row.max_score,
+        'percentage': row.percentage,
+        'user_name': row.user_name,
+        'quiz_title': row.quiz_title
+    }
+
+
+@memoized(tags=lambda attempt_id: [f'attempt:{attempt_id}', 'quizzes'])
 def get_quiz_attempt_by_id(attempt_id):
-    """Fetch a quiz attempt by its ID."""
-    return QuizAttempt.query.get_or_404(attempt_id)
+    """Fetch a quiz attempt by its ID as a dict, or None."""
+    row = db.session.execute(_attempt_columns().where(QuizAttempt.id == attempt_id)).first()
+    return _attempt_dict(row) if row else None
 
-@cache.cached(timeout=60, query_string=True)
+@memoized(tags=lambda: ['attempts', 'quizzes'])
 def get_all_quiz_attempts():
-    """Fetch all quiz attempts."""
-    return QuizAttempt.query.all()
+    """Fetch all quiz attempts as dicts."""
+    return [_attempt_dict(row) for row in db.session.execute(_attempt_columns())]
 
-@cache.cached(timeout=60, query_string=True)
+@memoized(tags=lambda user_id: [f'attempts:user:{user_id}', 'quizzes'])
 def get_quiz_attempts_by_user(user_id):
-    """Fetch all quiz attempts for a specific user."""
-    return QuizAttempt.query.filter_by(user_id=user_id).all()
+    """Fetch all quiz attempts for a specific user as dicts."""
+    return [_attempt_dict(row) for row in db.session.execute(
+        _attempt_columns().where(QuizAttempt.user_id == user_id)
+    )]
 
-@cache.cached(timeout=60, query_string=True)
+@memoized(tags=lambda user_id: [f'attempts:user:{user_id}', 'quizzes', 'subjects'])
 def get_quiz_attempts_by_user_ordered_by_timestamp_desc(user_id):
-    """Fetch all quiz attempts for a specific user."""
-    return (
-        QuizAttempt.query.options(
-            joinedload(QuizAttempt.quiz).joinedload(Quiz.chapter).joinedload(Chapter.subject)
-        )
-        .filter_by(user_id=user_id)
+    """Fetch (id, timestamp, subject name) for a user's attempts, newest first."""
+    return [tuple(row) for row in db.session.execute(
+        select(QuizAttempt.id, QuizAttempt.timestamp, Subject.name)
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .where(QuizAttempt.user_id == user_id)
         .order_by(QuizAttempt.timestamp.desc())
-        .all()
-    )
+    )]
 
-@cache.cached(timeout=300)
-def get_quiz_attempts_with_everything():
-    """Fetch statistics for all quiz attempts."""
-    return (
-        QuizAttempt.query.options(
-                joinedload(QuizAttempt.quiz)
-                .joinedload(Quiz.chapter)
-                .joinedload(Chapter.subject)
-            ).all()
+def _prefix_upper_bound(prefix):
+    """The least string above every string that starts with prefix, in code point order (None if there is none)."""
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000  # Surrogates never occur in stored text
+    return prefix[:-1] + chr(following)
+
+
+def prefix_match(column, prefix):
+    """
+    column starts with prefix, in a form column's b-tree index serves. LIKE on
+    PostgreSQL, where the search keys use the C collation; SQLite only indexes
+    LIKE on NOCASE columns, so there it is a range, which matches the same rows
+    under its byte-order BINARY collation.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return column.like(escaped + '%', escape='\\')
+    upper = _prefix_upper_bound(prefix)
+    if upper is None:
+        return column >= prefix
+    return and_(column >= prefix, column < upper)
+
+
+# Sort keys for the admin user listing, indexed like the search
+USER_SORT_COLUMNS = {
+    'id': User.id,
+    'email': User.email_search,
+    'full_name': User.full_name_search,
+}
+
+
+def student_users_query(search=None, active=None, sort='id', descending=False):
+    """
+    Users with the 'user' role, for paginating. search is a case-insensitive
+    prefix of the email or full name (ix_users_email_search / ix_users_full_name_search).
+    """
+    query = (
+        User.query.options(selectinload(User.roles))
+        .join(roles_users).join(Role).filter(Role.name == 'user')
     )
+    if search:
+        prefix = search_key(search.strip())
+        query = query.filter(or_(
+            prefix_match(User.email_search, prefix),
+            prefix_match(User.full_name_search, prefix)
+        ))
+    if active is not None:
+        query = query.filter(User.active == active)
+    column = USER_SORT_COLUMNS[sort]
+    if descending:
+        return query.order_by(column.desc(), User.id.desc())
+    return query.order_by(column, User.id)
+
 
-@cache.cached(timeout=60, query_string=True)
-def get_all_users():
-    """Fetch all users."""
-    return User.query.options(selectinload(User.roles)).join(roles_users).join(Role).filter(Role.name == 'user').all()
+def user_to_dict(user):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'full_name': user.full_name,
+        'qualification': user.qualification,
+        'dob': user.dob,
+        'active': user.active,
+        'roles': [role.name for role in user.roles]
+    }
@@ -1,6 +1,27 @@
+from sqlalchemy import event
 from sqlalchemy.ext.declarative import declarative_base
 from flask_sqlalchemy import SQLAlchemy
 
 engine = None
 Base = declarative_base()
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+
+def init_sqlite_pragmas(app):
+    """
+    Put every new connection of a SQLite engine in WAL mode with a busy
+    timeout and synchronous=NORMAL when SQLITE_WAL is set. Needs an app
+    context, and must run before the engine opens its first connection.
+    """
+    engine = db.engine
+    if engine.dialect.name != 'sqlite' or not app.config['SQLITE_WAL']:
+        return
+    busy_timeout = int(app.config['SQLITE_BUSY_TIMEOUT_MS'])
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f'PRAGMA busy_timeout={busy_timeout}')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
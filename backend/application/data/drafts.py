@@ -0,0 +1,57 @@
+import redis
+from flask import current_app
+
+from application.data.redis_store import get_redis
+
+# In-progress quiz answers, one Redis hash per (user, quiz): question id -> selected option.
+# Drafts never touch SQL; the final submission scores from them.
+
+DRAFT_PREFIX = 'draft:'
+
+
+class DraftStoreUnavailable(Exception):
+    """Raised when the draft store can't be reached."""
+
+
+def _key(user_id, quiz_id):
+    return f'{DRAFT_PREFIX}{user_id}:{quiz_id}'
+
+
+def draft_ttl(answer_key):
+    """Seconds a draft lives: the quiz duration plus a grace period for the final submit."""
+    return answer_key.time_duration * 60 + current_app.config['DRAFT_TTL_GRACE_SECONDS']
+
+
+def save_draft(user_id, answer_key, answers):
+    """
+    Merge answers ({question_id: option}) into the user's draft. The expiry is
+    set by the first save, so a quiz's draft can't outlive the quiz.
+    Returns the seconds left before the draft expires.
+    """
+    key = _key(user_id, answer_key.quiz_id)
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hset(key, mapping=answers)
+        pipe.ttl(key)
+        _, ttl = pipe.execute()
+        if ttl < 0:
+            ttl = draft_ttl(answer_key)
+            get_redis().expire(key, ttl)
+        return ttl
+    except redis.RedisError as e:
+        raise DraftStoreUnavailable(str(e)) from e
+
+
+def get_draft(user_id, quiz_id):
+    """The user's saved answers for a quiz as {question_id: option}, empty if none."""
+    try:
+        return {question_id: int(option) for question_id, option in get_redis().hgetall(_key(user_id, quiz_id)).items()}
+    except redis.RedisError as e:
+        raise DraftStoreUnavailable(str(e)) from e
+
+
+def delete_draft(user_id, quiz_id):
+    try:
+        get_redis().delete(_key(user_id, quiz_id))
+    except redis.RedisError as e:
+        raise DraftStoreUnavailable(str(e)) from e
@@ -0,0 +1,193 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+from collections import namedtuple
+from tempfile import SpooledTemporaryFile
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import select
+
+from application.data.models import Chapter, Quiz, QuizAttempt, Subject, User, db
+
+EXPORT_BATCH_SIZE = 1000
+# CSVs are held in memory up to this size, then spill to a temp file
+SPOOL_MAX_SIZE = 1024 * 1024
+# CSVs larger than this are gzipped before they are attached
+GZIP_THRESHOLD = 5 * 1024 * 1024
+
+CSV_HEADER = [
+    'Quiz Title', 'Subject', 'Chapter', 'Date Attempted',
+    'Score', 'Max Score', 'Percentage', 'Quiz Remarks'
+]
+
+# file is positioned at the start; the caller closes it
+ExportFile = namedtuple('ExportFile', ['file', 'filename', 'mimetype', 'row_count'])
+
+
+class InvalidExportLink(ValueError):
+    """Raised when an emailed export link is forged, expired or no longer allowed."""
+
+
+def _link_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='attempts-export-link')
+
+
+def export_link_token(user_id, all_users=False):
+    """
+    Signed token that stands in for the auth header on an emailed link to the
+    streaming download, for one user's attempts or (all_users) everyone's.
+    """
+    return _link_serializer().dumps({'user_id': user_id, 'all_users': all_users})
+
+
+def read_export_link_token(token):
+    """
+    The user_id to export for a link token, None for every user. The user
+    must still be active, and an admin for an all-users link.
+    """
+    try:
+        claims = _link_serializer().loads(token, max_age=current_app.config['EXPORT_LINK_MAX_AGE'])
+    except BadSignature as e:
+        raise InvalidExportLink('Invalid or expired download link') from e
+
+    user = db.session.get(User, claims['user_id'])
+    if user is None or not user.active or (claims['all_users'] and not user.has_role('admin')):
+        raise InvalidExportLink('Download link is no longer valid')
+    return None if claims['all_users'] else user.id
+
+
+def export_size(export):
+    """Size of an ExportFile in bytes, leaving it positioned at the start."""
+    size = export.file.seek(0, os.SEEK_END)
+    export.file.seek(0)
+    return size
+
+
+def iter_attempts(user_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield quiz attempts newest first as flat rows, for one user or (user_id=None)
+    for everyone. One joined column select read through a server-side cursor,
+    batch_size rows at a time, so memory stays flat however long the history is.
+    """
+    stmt = (
+        select(
+            User.email.label('user_email'),
+            Quiz.title.label('quiz_title'),
+            Subject.name.label('subject_name'),
+            Chapter.name.label('chapter_name'),
+            QuizAttempt.timestamp,
+            QuizAttempt.total_score,
+            QuizAttempt.max_score,
+            QuizAttempt.percentage,
+            Quiz.remarks.label('quiz_remarks')
+        )
+        .join(User, QuizAttempt.user_id == User.id)
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .order_by(QuizAttempt.timestamp.desc(), QuizAttempt.id.desc())
+        .execution_options(yield_per=batch_size)
+    )
+    if user_id is not None:
+        stmt = stmt.where(QuizAttempt.user_id == user_id)
+
+    yield from db.session.execute(stmt)
+
+
+def csv_header(include_user=False):
+    return (['User Email'] if include_user else []) + CSV_HEADER
+
+
+def csv_row(row, include_user=False):
+    values = [
+        row.quiz_title,
+        row.subject_name,
+        row.chapter_name,
+        row.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        row.total_score,
+        row.max_score,
+        f"{row.percentage:.2f}%",
+        row.quiz_remarks
+    ]
+    return ([row.user_email] if include_user else []) + values
+
+
+def json_record(row, include_user=False):
+    record = {
+        'quiz_title': row.quiz_title,
+        'subject': row.subject_name,
+        'chapter': row.chapter_name,
+        'timestamp': row.timestamp.isoformat(),
+        'total_score': row.total_score,
+        'max_score': row.max_score,
+        'percentage': row.percentage,
+        'quiz_remarks': row.quiz_remarks
+    }
+    if include_user:
+        record = {'user_email': row.user_email, **record}
+    return record
+
+
+def iter_csv_chunks(user_id=None, rows_per_chunk=EXPORT_BATCH_SIZE):
+    """CSV export as a stream of text chunks of rows_per_chunk rows, header first."""
+    include_user = user_id is None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(csv_header(include_user))
+
+    for count, row in enumerate(iter_attempts(user_id), 1):
+        writer.writerow(csv_row(row, include_user))
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson_chunks(user_id=None, rows_per_chunk=EXPORT_BATCH_SIZE):
+    """Newline-delimited JSON export, one object per attempt, in chunks of rows_per_chunk."""
+    include_user = user_id is None
+    lines = []
+    for row in iter_attempts(user_id):
+        lines.append(json.dumps(json_record(row, include_user)) + '\n')
+        if len(lines) == rows_per_chunk:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def write_attempts_csv(user_id=None):
+    """
+    Stream attempts into a spooled temp file as CSV, gzipped when it grows past
+    GZIP_THRESHOLD. user_id=None exports every user's attempts with their email.
+    """
+    include_user = user_id is None
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    text = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(csv_header(include_user))
+
+    row_count = 0
+    for row in iter_attempts(user_id):
+        writer.writerow(csv_row(row, include_user))
+        row_count += 1
+    text.flush()
+    # Hand the byte stream back without closing it along with the wrapper
+    text.detach()
+
+    if spool.tell() <= GZIP_THRESHOLD:
+        spool.seek(0)
+        return ExportFile(spool, 'quiz_attempts.csv', 'text/csv', row_count)
+
+    compressed = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    spool.seek(0)
+    with gzip.GzipFile(filename='quiz_attempts.csv', mode='wb', fileobj=compressed) as gz:
+        shutil.copyfileobj(spool, gz)
+    spool.close()
+    compressed.seek(0)
+    return ExportFile(compressed, 'quiz_attempts.csv.gz', 'application/gzip', row_count)
@@ -1,13 +1,18 @@
+import unicodedata
 from datetime import datetime
 from flask_security import UserMixin, RoleMixin
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import relationship, validates
 
 from application.data.database import db, Base
 
 
 roles_users = db.Table('roles_users',
     db.Column('user_id', db.Integer(), db.ForeignKey('users.id')),
-    db.Column('role_id', db.Integer(), db.ForeignKey('role.id'))
+    db.Column('role_id', db.Integer(), db.ForeignKey('role.id')),
+    # current_user.roles lookups and the role -> users join in the admin user listing
+    db.Index('ix_roles_users_user_id', 'user_id'),
+    db.Index('ix_roles_users_role_id_user_id', 'role_id', 'user_id')
 )
 
 class Role(db.Model, RoleMixin):
@@ -15,6 +20,20 @@ class Role(db.Model, RoleMixin):
     name = db.Column(db.String(80), unique=True)
     description = db.Column(db.String(255))
 
+def search_key(value):
+    """A name or email folded for case-insensitive matching (Unicode-aware, unlike SQL lower())."""
+    return unicodedata.normalize('NFKC', value).casefold() if value is not None else None
+
+
+def _search_key_default(column):
+    # Fills the key on every INSERT that doesn't set it, Core bulk inserts included
+    return lambda context: search_key(context.get_current_parameters().get(column))
+
+
+# Byte order on PostgreSQL, so LIKE 'prefix%' and ORDER BY both use a plain b-tree index
+SearchKey = db.Text().with_variant(postgresql.TEXT(collation='C'), 'postgresql')
+
+
 class User(db.Model, UserMixin, Base):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -28,11 +47,25 @@ class User(db.Model, UserMixin, Base):
     active = db.Column(db.Boolean(), default=True)
     fs_uniquifier = db.Column(db.String(255), unique=True, nullable=False)
 
+    # search_key() of email and full_name for prefix search and sorting in the admin user listing
+    email_search = db.Column(SearchKey, nullable=False, default=_search_key_default('email'))
+    full_name_search = db.Column(SearchKey, nullable=False, default=_search_key_default('full_name'))
+
     # Relationships
     roles = relationship('Role', secondary=roles_users,
-                        backref=db.backref('users', lazy='subquery'))
+                        backref=db.backref('users'))
     quiz_attempts = relationship('QuizAttempt', back_populates='user')
 
+    __table_args__ = (
+        db.Index('ix_users_email_search', 'email_search'),
+        db.Index('ix_users_full_name_search', 'full_name_search'),
+    )
+
+    @validates('email', 'full_name')
+    def _update_search_key(self, key, value):
+        setattr(self, f'{key}_search', search_key(value))
+        return value
+
     def __repr__(self):
         return f'<User {self.email}>'
 
@@ -47,6 +80,7 @@ class Subject(db.Model):
 
     # Relationships
     chapters = relationship('Chapter', back_populates='subject', cascade='all, delete-orphan')
+    attempt_stats = relationship('SubjectAttemptStats', back_populates='subject', uselist=False, cascade='all, delete-orphan')
 
 class Chapter(db.Model):
     __tablename__ = 'chapters'
@@ -58,7 +92,12 @@ class Chapter(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now)
 
     subject = relationship('Subject', back_populates='chapters')
-    quizzes = relationship('Quiz', back_populates='chapter', cascade='all, delete-orphan', lazy='subquery')
+    quizzes = relationship('Quiz', back_populates='chapter', cascade='all, delete-orphan')
+
+    __table_args__ = (
+        # Chapters of a subject, and the duplicate name check on create
+        db.Index('ix_chapters_subject_id_name', 'subject_id', 'name'),
+    )
 
 class Quiz(db.Model):
     """
@@ -75,10 +114,16 @@ class Quiz(db.Model):
     is_active = db.Column(db.Boolean, default=True)
 
     # Relationships
-    chapter = relationship('Chapter', back_populates='quizzes', lazy='subquery')
+    chapter = relationship('Chapter', back_populates='quizzes')
     questions = relationship('Question', back_populates='quiz', cascade='all, delete-orphan')
     attempts = relationship('QuizAttempt', back_populates='quiz', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_quizzes_chapter_id', 'chapter_id'),
+        # Upcoming active quizzes for the daily reminders
+        db.Index('ix_quizzes_is_active_date_of_quiz', 'is_active', 'date_of_quiz'),
+    )
+
 class Question(db.Model):
     """
     Question model for MCQ questions in a quiz
@@ -97,6 +142,10 @@ class Question(db.Model):
     # Relationships
     quiz = relationship('Quiz', back_populates='questions')
 
+    __table_args__ = (
+        db.Index('ix_questions_quiz_id', 'quiz_id'),
+    )
+
 class QuizAttempt(db.Model):
     """
     Quiz attempt model to track user performance
@@ -110,7 +159,33 @@ class QuizAttempt(db.Model):
     total_score = db.Column(db.Float, nullable=False)
     max_score = db.Column(db.Float, nullable=False)
     percentage = db.Column(db.Float, nullable=False)
+    # Set for attempts that went through the write-behind queue, so a re-drained submission is stored once
+    submission_id = db.Column(db.String(32), unique=True)
 
     # Relationships
     user = relationship('User', back_populates='quiz_attempts')
-    quiz = relationship('Quiz', back_populates='attempts', lazy='subquery')
+    quiz = relationship('Quiz', back_populates='attempts')
+
+    __table_args__ = (
+        # A user's attempts newest first (attempt history pages, user stats)
+        db.Index('ix_quiz_attempts_user_id_timestamp', user_id, timestamp.desc()),
+        # Attempts of one quiz, newest first, and the quiz -> attempts join
+        db.Index('ix_quiz_attempts_quiz_id_timestamp', quiz_id, timestamp.desc()),
+        # Admin listing across all users and the monthly report window
+        db.Index('ix_quiz_attempts_timestamp', 'timestamp'),
+    )
+
+class SubjectAttemptStats(db.Model):
+    """
+    Running aggregate of quiz attempts per subject, kept in step with quiz_attempts
+    """
+    __tablename__ = 'subject_attempt_stats'
+
+    subject_id = db.Column(db.Integer, db.ForeignKey('subjects.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    max_percentage = db.Column(db.Float)
+    sum_percentage = db.Column(db.Float, nullable=False, default=0)
+    sum_sq_percentage = db.Column(db.Float, nullable=False, default=0)
+
+    # Relationships
+    subject = relationship('Subject', back_populates='attempt_stats')
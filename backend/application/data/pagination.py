@@ -0,0 +1,58 @@
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor', 'has_next', 'total'])
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor can't be decoded."""
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque cursor for the position just after (timestamp, id)."""
+    payload = json.dumps([timestamp.isoformat(), row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+def keyset_paginate(query, timestamp_column, id_column, cursor=None, per_page=10, include_total=False):
+    """
+    Page through query newest first, keyed on (timestamp, id) instead of OFFSET,
+    so every page costs the same as the first. The total is only counted when
+    asked for, since that is a full COUNT(*) over the filtered rows.
+    """
+    per_page = max(per_page, 1)
+    query = query.order_by(None)
+    total = query.count() if include_total else None
+
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < row_id)
+        ))
+
+    # One extra row tells us whether there is a next page
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor(last.timestamp, last.id)
+
+    return KeysetPage(items, next_cursor, has_next, total)
@@ -0,0 +1,15 @@
+import redis
+from flask import current_app
+
+
+def get_redis():
+    """
+    Client for the Redis that holds live quiz state (answer drafts, queued
+    submissions), created once per app. Separate from the cache, since this
+    data must not be evicted.
+    """
+    client = current_app.extensions.get('quiz_state_redis')
+    if client is None:
+        client = redis.Redis.from_url(current_app.config['QUIZ_STATE_REDIS_URL'], decode_responses=True)
+        current_app.extensions['quiz_state_redis'] = client
+    return client
@@ -0,0 +1,109 @@
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from application.data.aggregates import subject_totals_query
+from application.data.models import Chapter, Quiz, QuizAttempt, SubjectAttemptStats, db
+
+stats_table = SubjectAttemptStats.__table__
+
+# INSERT ... ON CONFLICT for the databases the app runs on
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def get_subject_id_for_quiz(quiz_id):
+    """Fetch the subject a quiz belongs to."""
+    return db.session.execute(
+        select(Chapter.subject_id).join(Quiz, Quiz.chapter_id == Chapter.id).where(Quiz.id == quiz_id)
+    ).scalar()
+
+
+def record_attempt(subject_id, percentage):
+    """Add one attempt to the subject's running aggregate. The caller commits."""
+    record_attempts(subject_id, [percentage])
+
+
+def record_attempts(subject_id, percentages):
+    """
+    Add a batch of attempts for one subject in a single upsert, so concurrent
+    first attempts for a subject can't both insert its row. The caller commits.
+    """
+    percentages = [float(p) for p in percentages]
+    if not percentages:
+        return
+    top = max(percentages)
+
+    stmt = UPSERT_INSERTS[db.session.get_bind().dialect.name](stats_table).values(
+        subject_id=subject_id,
+        attempt_count=len(percentages),
+        max_percentage=top,
+        sum_percentage=sum(percentages),
+        sum_sq_percentage=sum(p * p for p in percentages)
+    )
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[stats_table.c.subject_id],
+            set_={
+                'attempt_count': stats_table.c.attempt_count + stmt.excluded.attempt_count,
+                'max_percentage': case(
+                    (stats_table.c.max_percentage.is_(None), stmt.excluded.max_percentage),
+                    (stats_table.c.max_percentage < stmt.excluded.max_percentage, stmt.excluded.max_percentage),
+                    else_=stats_table.c.max_percentage
+                ),
+                'sum_percentage': stats_table.c.sum_percentage + stmt.excluded.sum_percentage,
+                'sum_sq_percentage': stats_table.c.sum_sq_percentage + stmt.excluded.sum_sq_percentage
+            }
+        )
+    )
+
+
+def remove_attempt(subject_id, percentage):
+    """
+    Take one deleted attempt out of the subject's running aggregate.
+    The attempt row must already be deleted (flushed) so the top score
+    can be recomputed when it was the one removed. The caller commits.
+    """
+    current_max = db.session.execute(
+        select(stats_table.c.max_percentage).where(stats_table.c.subject_id == subject_id)
+    ).scalar()
+
+    values = {
+        'attempt_count': stats_table.c.attempt_count - 1,
+        'sum_percentage': stats_table.c.sum_percentage - percentage,
+        'sum_sq_percentage': stats_table.c.sum_sq_percentage - percentage * percentage,
+    }
+    if current_max is not None and percentage >= current_max:
+        # The top score may have gone with this attempt, so look it up again
+        values['max_percentage'] = (
+            select(func.max(QuizAttempt.percentage))
+            .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+            .join(Chapter, Quiz.chapter_id == Chapter.id)
+            .where(Chapter.subject_id == subject_id)
+            .scalar_subquery()
+        )
+
+    db.session.execute(
+        update(stats_table).where(stats_table.c.subject_id == subject_id).values(**values)
+    )
+    db.session.execute(
+        delete(stats_table).where(stats_table.c.subject_id == subject_id, stats_table.c.attempt_count <= 0)
+    )
+
+
+def rebuild_subject_stats(subject_id=None):
+    """
+    Recompute the aggregate from quiz_attempts, for one subject or for all of them.
+    Returns the number of subjects that have attempts. The caller commits.
+    """
+    clear = delete(stats_table)
+    if subject_id is not None:
+        clear = clear.where(stats_table.c.subject_id == subject_id)
+
+    db.session.execute(clear)
+    result = db.session.execute(
+        insert(stats_table).from_select(
+            ['subject_id', 'attempt_count', 'max_percentage', 'sum_percentage', 'sum_sq_percentage'],
+            subject_totals_query(subject_id)
+        )
+    )
+    return result.rowcount
+
@@ -0,0 +1,54 @@
+import logging
+
+from sqlalchemy import select
+
+from application import cache
+from application.data.caching import get_tag_versions, memoized
+from application.data.models import Subject, db
+
+# The admin subject tree (subject -> chapters -> quizzes -> questions) cached
+# as encoded JSON, one entry per subject. A change under a subject bumps only
+# its subject:<id>:tree tag (see cache_events.subject_tree_tags), so after a
+# write just that subject is rebuilt and the full listing is re-joined from bytes.
+
+logger = logging.getLogger(__name__)
+
+TREE_PREFIX = 'subject_tree:'
+
+
+@memoized(tags=lambda: ['subjects'])
+def get_subject_ids():
+    """Every subject id, in listing order."""
+    return list(db.session.scalars(select(Subject.id).order_by(Subject.id)))
+
+
+def get_encoded_subjects(subject_ids, encode):
+    """
+    {subject_id: JSON bytes} for the given subjects. Cached entries are
+    reused; the rest come from encode(ids) -> {subject_id: bytes}, called
+    once for all of them, and are cached. Missing subjects are left out.
+    """
+    subject_ids = list(subject_ids)
+    if not subject_ids:
+        return {}
+    versions = get_tag_versions([f'subject:{subject_id}:tree' for subject_id in subject_ids])
+    if versions is None:
+        return encode(subject_ids)
+
+    keys = [f'{TREE_PREFIX}{subject_id}:{version}' for subject_id, version in zip(subject_ids, versions)]
+    try:
+        cached = cache.get_many(*keys)
+    except Exception:
+        logger.warning("Cache unavailable while reading subject trees", exc_info=True)
+        cached = [None] * len(keys)
+    encoded = {subject_id: body for subject_id, body in zip(subject_ids, cached) if body is not None}
+
+    missing = [subject_id for subject_id in subject_ids if subject_id not in encoded]
+    if missing:
+        built = encode(missing)
+        try:
+            cache.set_many({key: built[subject_id] for subject_id, key in zip(subject_ids, keys) if subject_id in built})
+        except Exception:
+            logger.warning("Cache unavailable while writing subject trees", exc_info=True)
+        encoded.update(built)
+    return encoded
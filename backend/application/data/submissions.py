@@ -0,0 +1,232 @@
+import json
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import redis
+from flask import current_app
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+
+from application.data.cache_events import mark_stale
+from application.data.database import db
+from application.data.models import QuizAttempt
+from application.data.redis_store import get_redis
+from application.data.subject_stats import record_attempts
+
+logger = logging.getLogger(__name__)
+
+# Write-behind submissions. The API scores an attempt, stores it in a status
+# hash and pushes its id onto QUEUE_KEY in one MULTI/EXEC, and answers 202.
+# drain_submissions moves ids to PROCESSING_KEY while it writes them to SQL and
+# removes them only after the commit, so an id is always in one of the two lists
+# until its attempt row exists. How much survives a Redis crash depends on its
+# persistence: run it with appendonly yes (appendfsync everysec loses at most ~1s).
+
+QUEUE_KEY = 'submissions:queue'
+PROCESSING_KEY = 'submissions:processing'
+LOCK_KEY = 'submissions:drain-lock'
+STATUS_PREFIX = 'submission:'
+
+# Delete the drain lock only if this drain still holds it; once it has expired
+# another drain may have taken it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SubmissionQueueUnavailable(Exception):
+    """Raised when the submission queue can't be reached."""
+
+
+class SubmissionStoreUnavailable(Exception):
+    """Raised when a drain stops on a database error that may pass; its submissions stay queued."""
+
+
+def _is_permanent(error):
+    # A row the database rejects fails the same way every time; anything else
+    # (a lock timeout, a dropped connection) is retried on the next drain
+    return isinstance(error, (IntegrityError, DataError))
+
+
+def _status_key(submission_id):
+    return f'{STATUS_PREFIX}{submission_id}'
+
+
+def new_submission_id():
+    return uuid.uuid4().hex
+
+
+def enqueue_submission(attempt):
+    """
+    Queue a scored attempt (a dict of QuizAttempt columns plus submission_id
+    and subject_id) for the next drain. Once this returns the attempt is in Redis.
+    The record has no TTL until the drain stores or fails it, however long that takes.
+    """
+    key = _status_key(attempt['submission_id'])
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.hset(key, mapping={
+            'status': 'queued',
+            'user_id': attempt['user_id'],
+            'attempt': json.dumps(attempt)
+        })
+        pipe.lpush(QUEUE_KEY, attempt['submission_id'])
+        pipe.execute()
+    except redis.RedisError as e:
+        raise SubmissionQueueUnavailable(str(e)) from e
+
+
+def get_submission_status(submission_id):
+    """
+    {'status': 'queued' | 'stored' | 'failed', 'user_id', ...} for a submission,
+    or None if it is unknown. Falls back to SQL once the Redis record has expired.
+    """
+    try:
+        status = get_redis().hgetall(_status_key(submission_id))
+    except redis.RedisError as e:
+        raise SubmissionQueueUnavailable(str(e)) from e
+
+    if status:
+        result = {'submission_id': submission_id, 'status': status['status'], 'user_id': int(status['user_id'])}
+        if 'attempt_id' in status:
+            result['attempt_id'] = int(status['attempt_id'])
+        if 'error' in status:
+            result['error'] = status['error']
+        return result
+
+    row = db.session.execute(
+        select(QuizAttempt.id, QuizAttempt.user_id).where(QuizAttempt.submission_id == submission_id)
+    ).first()
+    if row is None:
+        return None
+    return {'submission_id': submission_id, 'status': 'stored', 'user_id': row.user_id, 'attempt_id': row.id}
+
+
+def queue_length():
+    """Submissions waiting for SQL, queued plus in-flight."""
+    try:
+        pipe = get_redis().pipeline()
+        pipe.llen(QUEUE_KEY)
+        pipe.llen(PROCESSING_KEY)
+        return sum(pipe.execute())
+    except redis.RedisError as e:
+        raise SubmissionQueueUnavailable(str(e)) from e
+
+
+def drain_submissions(batch_size):
+    """
+    Write up to batch_size queued submissions with one multi-row INSERT and
+    one commit. Only one drain runs at a time; returns the number of submissions
+    taken off the queue (0 when it is empty or another drain holds the lock).
+    Only rows the database rejects are marked failed; on any other database
+    error the batch stays queued and SubmissionStoreUnavailable is raised.
+    """
+    client = get_redis()
+    token = uuid.uuid4().hex
+    if not client.set(LOCK_KEY, token, nx=True, ex=current_app.config['SUBMISSION_DRAIN_LOCK_SECONDS']):
+        return 0
+
+    try:
+        # Left over from a drain that died mid-batch; put them back at the head of the queue
+        while client.lmove(PROCESSING_KEY, QUEUE_KEY, 'RIGHT', 'RIGHT'):
+            pass
+
+        pipe = client.pipeline()
+        for _ in range(batch_size):
+            pipe.lmove(QUEUE_KEY, PROCESSING_KEY, 'RIGHT', 'LEFT')
+        submission_ids = [submission_id for submission_id in pipe.execute() if submission_id]
+        if not submission_ids:
+            return 0
+
+        pipe = client.pipeline()
+        for submission_id in submission_ids:
+            pipe.hget(_status_key(submission_id), 'attempt')
+        attempts = []
+        for submission_id, attempt in zip(submission_ids, pipe.execute()):
+            if attempt is None:
+                logger.error("Queued submission %s has no record, dropping it", submission_id)
+                client.lrem(PROCESSING_KEY, 1, submission_id)
+                continue
+            attempts.append(json.loads(attempt))
+
+        stored = {}
+        try:
+            try:
+                stored = _write_attempts(attempts)
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                if not _is_permanent(e):
+                    raise
+                logger.exception("Batch of %d submissions failed, writing them one at a time", len(attempts))
+                for attempt in attempts:
+                    try:
+                        stored.update(_write_attempts([attempt]))
+                    except SQLAlchemyError as e:
+                        db.session.rollback()
+                        if not _is_permanent(e):
+                            raise
+                        logger.error("Submission %s failed: %s", attempt['submission_id'], e)
+                        _finish(client, attempt['submission_id'], status='failed', error='Could not be saved')
+        except SQLAlchemyError as e:
+            # Left in the processing list with their payloads; the next drain requeues them
+            logger.error("Database unavailable, the rest of the batch stays queued: %s", e)
+            raise SubmissionStoreUnavailable(str(e)) from e
+        finally:
+            for submission_id, attempt_id in stored.items():
+                _finish(client, submission_id, status='stored', attempt_id=attempt_id)
+        return len(submission_ids)
+    finally:
+        client.eval(RELEASE_LOCK_SCRIPT, 1, LOCK_KEY, token)
+
+
+def _write_attempts(attempts):
+    """INSERT the attempts not already in SQL and commit. Returns {submission_id: attempt_id}."""
+    # A drain that died after its commit leaves stored ids in the queue, so skip those
+    submission_ids = [attempt['submission_id'] for attempt in attempts]
+    stored = dict(db.session.execute(
+        select(QuizAttempt.submission_id, QuizAttempt.id).where(QuizAttempt.submission_id.in_(submission_ids))
+    ).all())
+
+    rows = []
+    percentages = defaultdict(list)
+    for attempt in attempts:
+        if attempt['submission_id'] in stored:
+            continue
+        rows.append({
+            'submission_id': attempt['submission_id'],
+            'user_id': attempt['user_id'],
+            'quiz_id': attempt['quiz_id'],
+            'total_score': attempt['total_score'],
+            'max_score': attempt['max_score'],
+            'percentage': attempt['percentage'],
+            'timestamp': datetime.fromisoformat(attempt['timestamp'])
+        })
+        percentages[attempt['subject_id']].append(attempt['percentage'])
+
+    if rows:
+        attempt_ids = db.session.scalars(
+            insert(QuizAttempt).returning(QuizAttempt.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        for subject_id, subject_percentages in percentages.items():
+            record_attempts(subject_id, subject_percentages)
+        mark_stale(db.session, 'attempts', *{f"attempts:user:{row['user_id']}" for row in rows})
+        db.session.commit()
+        stored.update(zip((row['submission_id'] for row in rows), attempt_ids))
+    return stored
+
+
+def _finish(client, submission_id, status, **fields):
+    """Record the outcome, start the status TTL and take the submission off the processing list."""
+    key = _status_key(submission_id)
+    pipe = client.pipeline(transaction=True)
+    pipe.hset(key, mapping={'status': status, **fields})
+    pipe.hdel(key, 'attempt')
+    pipe.expire(key, current_app.config['SUBMISSION_STATUS_TTL'])
+    pipe.lrem(PROCESSING_KEY, 1, submission_id)
+    pipe.execute()
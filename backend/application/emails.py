@@ -0,0 +1,54 @@
+from jinja2 import Environment, PackageLoader, select_autoescape
+from markupsafe import Markup
+
+# Templates are compiled on first use and kept for the life of the worker process
+_env = Environment(
+    loader=PackageLoader('application', 'templates/email'),
+    autoescape=select_autoescape(['html']),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False
+)
+
+
+def render_reminder_quiz_list(quizzes):
+    """
+    The upcoming-quiz block shared by every reminder in a batch. quizzes have
+    title, subject_name, chapter_name, date_of_quiz and time_duration.
+    Render it once and pass it to render_reminder for each user.
+    """
+    return Markup(_env.get_template('quiz_reminder_quizzes.html').render(quizzes=quizzes))
+
+
+def render_reminder(full_name, quiz_list):
+    return _env.get_template('quiz_reminder.html').render(full_name=full_name, quiz_list=quiz_list)
+
+
+def render_performance_report(full_name, subjects):
+    """
+    Monthly report for one user. subjects holds (subject name, attempts, total
+    score, max possible score) for the last month; empty means no activity.
+    """
+    total_attempts = sum(attempts for _, attempts, _, _ in subjects)
+    total_score = sum(subject_score for _, _, subject_score, _ in subjects)
+    max_possible_score = sum(subject_max_score for _, _, _, subject_max_score in subjects)
+    return _env.get_template('performance_report.html').render(
+        full_name=full_name,
+        total_attempts=total_attempts,
+        total_score=total_score,
+        max_possible_score=max_possible_score,
+        average_percentage=(total_score / max_possible_score * 100) if max_possible_score > 0 else 0,
+        subjects=[
+            (subject, attempts, (subject_score / subject_max_score * 100) if subject_max_score > 0 else 0)
+            for subject, attempts, subject_score, subject_max_score in subjects
+        ]
+    )
+
+
+def render_attempts_export(all_users=False, download_url=None, link_hours=None):
+    """The export email; with download_url it links to the download instead of mentioning an attachment."""
+    return _env.get_template('attempts_export.html').render(
+        all_users=all_users,
+        download_url=download_url,
+        link_hours=link_hours
+    )
@@ -0,0 +1,59 @@
+import functools
+import hashlib
+
+from flask import Response, request
+from flask_restful import unpack
+from flask_security import current_user
+
+from application.data.caching import get_tag_versions
+
+# Conditional GET for read-mostly listings. The ETag is derived from the
+# versions of the cache tags a response depends on, which every committed
+# write to those tables bumps (see application.data.cache_events), so a
+# request whose If-None-Match still matches is answered 304 without running
+# the view. Versions are read before the view runs: a write landing in
+# between gives a newer body under the older tag, which the next request
+# simply refetches, never the other way round.
+
+# Everything the subject -> chapter -> quiz -> question listings render
+CATALOG_TAGS = ('subjects', 'chapters', 'quizzes', 'questions')
+
+
+def compute_etag(tags):
+    """Strong ETag for the current request over tags, or None when the cache can't version them."""
+    versions = get_tag_versions(tags)
+    if versions is None:
+        return None
+    # Admins and students get different fields from the same URL
+    variant = (request.full_path, current_user.has_role('admin'), versions)
+    return hashlib.sha1(repr(variant).encode()).hexdigest()
+
+
+def conditional(tags):
+    """
+    Answer a Resource's GETs with an ETag and short-circuit a matching
+    If-None-Match to 304. tags(**view_args) returns the cache tags the response depends on.
+    Goes below the auth decorators, since the ETag varies with the user's role.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(resource, *args, **kwargs):
+            etag = compute_etag(tags(*args, **kwargs))
+            if etag is None:
+                return fn(resource, *args, **kwargs)
+
+            headers = {'ETag': f'"{etag}"', 'Cache-Control': 'private, no-cache', 'Vary': 'Authentication-Token'}
+            if request.if_none_match.contains(etag):
+                return Response(status=304, headers=headers)
+
+            rv = fn(resource, *args, **kwargs)
+            if isinstance(rv, Response):
+                if 200 <= rv.status_code < 300:
+                    rv.headers.update(headers)
+                return rv
+            data, code, extra_headers = unpack(rv)
+            if 200 <= code < 300:
+                return data, code, {**extra_headers, **headers}
+            return data, code, extra_headers
+        return wrapper
+    return decorator
@@ -0,0 +1,106 @@
+import smtplib
+import threading
+from time import monotonic
+
+from flask import current_app
+from flask_mail import Connection, Mail
+
+# Errors that mean the connection itself is gone, so the message is worth one retry
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SMTPPool:
+    """
+    One reusable Flask-Mail SMTP connection per worker process. A connection
+    idle for more than keepalive seconds is checked with NOOP before reuse,
+    a dropped connection is reopened and the message retried once, and the
+    connection is recycled after max_messages sends.
+    """
+
+    def __init__(self, app):
+        # Mail settings as of pool creation, independent of other Mail() instances
+        self.mail = Mail().init_mail(app.config, app.debug, app.testing)
+        self.max_messages = app.config['SMTP_POOL_MAX_MESSAGES']
+        self.keepalive = app.config['SMTP_POOL_KEEPALIVE_SECONDS']
+        self._lock = threading.Lock()
+        self._connection = None
+        self._sent = 0
+        self._last_used = 0.0
+
+    def send(self, message):
+        with self._lock:
+            try:
+                self._checkout().send(message)
+            except CONNECTION_ERRORS as e:
+                print(f"[INFO] SMTP connection lost ({e}), reconnecting")
+                self._discard()
+                self._checkout().send(message)
+            except smtplib.SMTPResponseException as e:
+                # 421: the server is closing the connection
+                if e.smtp_code != 421:
+                    raise
+                self._discard()
+                self._checkout().send(message)
+
+            self._sent += 1
+            self._last_used = monotonic()
+            if self._sent >= self.max_messages:
+                self._close_connection()
+
+    def close(self):
+        with self._lock:
+            self._close_connection()
+
+    def _checkout(self):
+        connection = self._connection
+        if connection is not None and connection.host is not None and monotonic() - self._last_used > self.keepalive:
+            try:
+                alive = connection.host.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                alive = False
+            if not alive:
+                self._discard()
+
+        if self._connection is None:
+            self._connection = Connection(self.mail).__enter__()
+            self._sent = 0
+        return self._connection
+
+    def _close_connection(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and connection.host is not None:
+            try:
+                connection.host.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.host.close()
+
+    def _discard(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and connection.host is not None:
+            connection.host.close()
+
+
+_pool = None
+
+
+def init_smtp_pool(app):
+    """Create this process's pool. Called from Celery's worker_process_init, after the fork."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+    _pool = SMTPPool(app)
+    return _pool
+
+
+def get_smtp_pool():
+    """The process's pool, created on first use where worker_process_init never fires (solo/eager)."""
+    if _pool is None:
+        return init_smtp_pool(current_app._get_current_object())
+    return _pool
+
+
+def close_smtp_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -0,0 +1,174 @@
+import hmac
+import logging
+import threading
+from collections import defaultdict
+from time import perf_counter
+
+from flask import Response, abort, current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from application.data.database import db
+
+logger = logging.getLogger(__name__)
+
+# Prometheus' default latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _EndpointStats:
+    __slots__ = ('bucket_counts', 'count', 'seconds', 'sql_statements', 'sql_seconds')
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request latency histograms plus SQL statement counts and time,
+    kept in process memory. Each worker process reports its own numbers, which
+    is what a Prometheus scrape of every worker expects.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(_EndpointStats)
+
+    def observe(self, endpoint, method, status, seconds, sql_statements, sql_seconds):
+        with self._lock:
+            stats = self._stats[(endpoint, method, status)]
+            stats.count += 1
+            stats.seconds += seconds
+            stats.sql_statements += sql_statements
+            stats.sql_seconds += sql_seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.bucket_counts[i] += 1
+                    break
+
+    def render(self):
+        """The collected metrics in the Prometheus text exposition format."""
+        with self._lock:
+            snapshot = sorted(self._stats.items())
+
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method, status), stats in snapshot:
+            labels = f'endpoint="{_escape(endpoint)}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, stats.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {stats.count}')
+
+        for name, kind, help_text, value in (
+            ('http_request_sql_statements_total', 'counter', 'SQL statements executed while serving requests.',
+             lambda stats: str(stats.sql_statements)),
+            ('http_request_sql_seconds_total', 'counter', 'Time spent in SQL while serving requests.',
+             lambda stats: f'{stats.sql_seconds:.6f}'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for (endpoint, method, status), stats in snapshot:
+                labels = f'endpoint="{_escape(endpoint)}",method="{method}",status="{status}"'
+                lines.append(f'{name}{{{labels}}} {value(stats)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _start_request():
+    g.metrics_started = perf_counter()
+    g.sql_statements = 0
+    g.sql_seconds = 0.0
+
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    # The URL rule, not the path, so /api/users/1 and /api/users/2 share a series
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    if endpoint != '/metrics':
+        request_metrics.observe(
+            endpoint,
+            request.method,
+            response.status_code,
+            perf_counter() - started,
+            g.get('sql_statements', 0),
+            g.get('sql_seconds', 0.0)
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_started', []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info['metrics_query_started'].pop()
+
+    threshold_ms = current_app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if threshold_ms is not None and elapsed * 1000 >= threshold_ms:
+        where = f' ({request.method} {request.path})' if has_request_context() else ''
+        logger.warning("Slow query%s took %.1f ms: %s", where, elapsed * 1000, ' '.join(statement.split()))
+
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+        g.sql_seconds += elapsed
+
+
+def _handle_error(context):
+    # A statement that fails never reaches after_cursor_execute, so drop its start time here
+    if context.connection is not None and context.execution_context is not None:
+        started = context.connection.info.get('metrics_query_started')
+        if started:
+            started.pop()
+
+
+def metrics_view():
+    # Off unless METRICS_TOKEN is set; a scraper sends it as a bearer token
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        abort(404)
+    sent = request.headers.get('Authorization', '').encode()
+    if not hmac.compare_digest(sent, f'Bearer {token}'.encode()):
+        return Response('Unauthorized\n', status=401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer realm="metrics"'})
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    """
+    Time every request and the SQL it runs, log statements slower than
+    SLOW_QUERY_THRESHOLD_MS, and serve the totals at /metrics to holders of METRICS_TOKEN.
+    Needs an app context, since it listens on the app's engine.
+    """
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    engine = db.engine
+    for name, listener in (
+        ('before_cursor_execute', _before_cursor_execute),
+        ('after_cursor_execute', _after_cursor_execute),
+        ('handle_error', _handle_error),
+    ):
+        if not event.contains(engine, name, listener):
+            event.listen(engine, name, listener)
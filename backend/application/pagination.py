@@ -0,0 +1,41 @@
+from flask import request
+
+from application.data.pagination import keyset_paginate
+
+
+def paginate_newest_first(query, timestamp_column, id_column):
+    """
+    Page query newest first as the request asks: by keyset with ?cursor= (empty
+    for the first page, include_total=true adds the COUNT), else by page/per_page.
+    Returns (items, pagination); raises InvalidCursor for a cursor that can't be decoded.
+    """
+    per_page = request.args.get('per_page', 10, type=int)
+    cursor = request.args.get('cursor')
+
+    if cursor is not None:
+        include_total = request.args.get('include_total', 'false').lower() in ['true', 'on', '1']
+        paginated = keyset_paginate(
+            query, timestamp_column, id_column,
+            cursor=cursor, per_page=per_page, include_total=include_total
+        )
+        return paginated.items, {
+            'per_page': per_page,
+            'next_cursor': paginated.next_cursor,
+            'has_next': paginated.has_next,
+            'total': paginated.total
+        }
+
+    page = request.args.get('page', 1, type=int)
+    paginated = query.order_by(timestamp_column.desc(), id_column.desc()).paginate(
+        page=page,
+        per_page=per_page,
+        error_out=False
+    )
+    return paginated.items, {
+        'page': page,
+        'per_page': per_page,
+        'total': paginated.total,
+        'pages': paginated.pages,
+        'has_next': paginated.has_next,
+        'has_prev': paginated.has_prev
+    }
@@ -0,0 +1,44 @@
+import datetime
+import json
+
+from flask import current_app, make_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON bodies for Flask-RESTful, registered on the Api in create_app. With
+# orjson installed (and API_JSON_ENCODER=orjson) encoding runs in C and
+# datetimes/dates are written natively, so views can return them as they come
+# from the database. Without it the stdlib encoder writes the same ISO strings.
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def use_orjson():
+    return orjson is not None and current_app.config['API_JSON_ENCODER'] == 'orjson'
+
+
+def dumps(data, indent=False):
+    """Encode data as JSON bytes with the configured encoder."""
+    if use_orjson():
+        try:
+            return orjson.dumps(data, default=_default, option=ORJSON_OPTIONS | (orjson.OPT_INDENT_2 if indent else 0))
+        except TypeError:
+            pass  # Something orjson won't take (e.g. an int over 64 bits); the stdlib path decides
+    return json.dumps(data, default=_default, indent=4 if indent else None).encode()
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTful's output_json on the configured encoder; indented in debug mode."""
+    resp = make_response(dumps(data, indent=current_app.debug) + b'\n', code)
+    resp.headers.extend(headers or {})
+    return resp
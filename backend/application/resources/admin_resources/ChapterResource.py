@@ -1,7 +1,10 @@
 from flask_restful import Resource, marshal, marshal_with, reqparse, fields
 from flask_security import auth_required, roles_required
-from ...data.models import Chapter
+from sqlalchemy.orm import joinedload, selectinload
+from ...data.models import Chapter, Quiz
 from ...data.database import db
+from ...data.subject_stats import rebuild_subject_stats
+from ...etags import CATALOG_TAGS, conditional
 
 from .QuizResource import quiz_fields
 
@@ -16,20 +19,28 @@ chapter_fields = {
 }
 
 
+# Subject name and questions for the nested quiz_fields
+chapter_tree_options = (
+    joinedload(Chapter.subject),
+    selectinload(Chapter.quizzes).selectinload(Quiz.questions),
+)
+
+
 class ChapterResource(Resource):
     parser = reqparse.RequestParser(bundle_errors=True)
     parser.add_argument('name', type=str, required=True, help="Name is required")
     parser.add_argument('description', type=str, required=False)
     @auth_required('token')
     @roles_required('admin')
+    @conditional(tags=lambda subject_id, c_id=None: CATALOG_TAGS)
     @marshal_with(chapter_fields)
     def get(self, subject_id, c_id=None):
         if c_id:
-            chapter = Chapter.query.filter_by(subject_id=subject_id, id=c_id).first()
+            chapter = Chapter.query.options(*chapter_tree_options).filter_by(subject_id=subject_id, id=c_id).first()
             if not chapter:
                 return {"message": f"Chapter with ID {c_id} not found"}, 404
             return chapter
-        chapters = Chapter.query.filter_by(subject_id=subject_id).all()
+        chapters = Chapter.query.options(*chapter_tree_options).filter_by(subject_id=subject_id).all()
         return chapters
 
     @auth_required('token')
@@ -79,6 +90,9 @@ class ChapterResource(Resource):
             return {"message": f"Chapter with ID {c_id} not found"}
 
         db.session.delete(chapter)
+        db.session.flush()
+        # Its quizzes' attempts went with it
+        rebuild_subject_stats(subject_id)
         db.session.commit()
 
         return {"message": f"Chapter with ID {c_id} deleted successfully"}
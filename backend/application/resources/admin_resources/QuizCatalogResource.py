@@ -0,0 +1,111 @@
+from datetime import datetime
+from flask import request
+from flask_restful import Resource
+from flask_security import auth_required, roles_accepted
+from sqlalchemy import func, select
+from ...data.models import Chapter, Question, Quiz, Subject
+from ...data.database import db
+from ...etags import CATALOG_TAGS, conditional
+
+
+def quiz_catalog_query():
+    """
+    Quiz metadata with chapter, subject and question count in one statement.
+    Questions are only counted (GROUP BY subquery), never loaded.
+    """
+    question_counts = (
+        select(Question.quiz_id, func.count(Question.id).label('num_questions'))
+        .group_by(Question.quiz_id)
+        .subquery()
+    )
+    return (
+        db.session.query(
+            Quiz.id,
+            Quiz.title,
+            Quiz.chapter_id,
+            Chapter.name.label('chapter'),
+            Chapter.subject_id,
+            Subject.name.label('subject'),
+            Quiz.date_of_quiz,
+            Quiz.time_duration,
+            Quiz.remarks,
+            Quiz.is_active,
+            func.coalesce(question_counts.c.num_questions, 0).label('num_questions')
+        )
+        .select_from(Quiz)
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .outerjoin(question_counts, question_counts.c.quiz_id == Quiz.id)
+    )
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    # Stored quiz dates are naive UTC
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+class QuizCatalogResource(Resource):
+    # quiz listing for dashboards: no questions, filtered and paginated in SQL
+
+    MAX_PER_PAGE = 100
+
+    @auth_required('token')
+    @roles_accepted('admin', 'user')
+    @conditional(tags=lambda: CATALOG_TAGS)
+    def get(self):
+        """
+        Filters: chapter_id, subject_id, active (true/false) and a date_of_quiz
+        range, from (inclusive) and to (exclusive), as ISO dates or datetimes.
+        Ordered by date_of_quiz; page and per_page (at most 100) paginate.
+        """
+        chapter_id = request.args.get('chapter_id', type=int)
+        subject_id = request.args.get('subject_id', type=int)
+        active = request.args.get('active')
+        page = request.args.get('page', 1, type=int)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), self.MAX_PER_PAGE)
+
+        query = quiz_catalog_query()
+        if chapter_id:
+            query = query.filter(Quiz.chapter_id == chapter_id)
+        if subject_id:
+            query = query.filter(Chapter.subject_id == subject_id)
+        if active is not None:
+            query = query.filter(Quiz.is_active == (active.lower() in ['true', 'on', '1']))
+
+        try:
+            date_from = _parse_date(request.args.get('from'))
+            date_to = _parse_date(request.args.get('to'))
+        except ValueError:
+            return {"message": "Invalid date range, use ISO format (YYYY-MM-DD or YYYY-MM-DDTHH:MM)"}, 400
+        if date_from:
+            query = query.filter(Quiz.date_of_quiz >= date_from)
+        if date_to:
+            query = query.filter(Quiz.date_of_quiz < date_to)
+
+        paginated = query.order_by(Quiz.date_of_quiz, Quiz.id).paginate(page=page, per_page=per_page, error_out=False)
+
+        return {
+            "quizzes": [{
+                "id": quiz.id,
+                "title": quiz.title,
+                "chapter_id": quiz.chapter_id,
+                "chapter": quiz.chapter,
+                "subject_id": quiz.subject_id,
+                "subject": quiz.subject,
+                "date_of_quiz": str(quiz.date_of_quiz) if quiz.date_of_quiz else None,
+                "time_duration": quiz.time_duration,
+                "remarks": quiz.remarks,
+                "is_active": quiz.is_active,
+                "num_questions": quiz.num_questions
+            } for quiz in paginated.items],
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "has_next": paginated.has_next,
+                "has_prev": paginated.has_prev
+            }
+        }, 200
@@ -1,9 +1,11 @@
 from datetime import datetime
 from flask_restful import Resource, marshal, marshal_with, reqparse, fields
-from flask_security import auth_required, roles_required, roles_accepted
+from flask_security import auth_required, current_user, roles_required, roles_accepted
 from sqlalchemy.orm import joinedload
 from ...data.models import Chapter, Quiz
 from ...data.database import db
+from ...data.subject_stats import rebuild_subject_stats
+from ...etags import CATALOG_TAGS, conditional
 from .QuestionResource import question_fields
 
 
@@ -19,6 +21,17 @@ quiz_fields = {
     "questions": fields.List(fields.Nested(question_fields)),
 }
 
+# What a student sees of a quiz: the questions without their answers
+student_question_fields = {name: field for name, field in question_fields.items() if name != "correct_option"}
+student_quiz_fields = {**quiz_fields, "questions": fields.List(fields.Nested(student_question_fields))}
+
+
+def quiz_tags(quiz_id=None):
+    """Cache tags a quiz (with its questions), or the whole listing, depends on."""
+    if quiz_id:
+        return [f'quiz:{quiz_id}', f'quiz:{quiz_id}:questions', 'chapters', 'subjects']
+    return CATALOG_TAGS
+
 
 class QuizResource(Resource):
 
@@ -32,7 +45,13 @@ class QuizResource(Resource):
 
     @auth_required('token')
     @roles_accepted('admin', 'user')
+    @conditional(tags=lambda quiz_id=None: quiz_tags(quiz_id))
     def get(self, quiz_id=None):
+        """
+        One quiz with its questions, e.g. when a student starts it. Listings
+        without an id should use /api/quizzes/catalog, which skips the questions.
+        """
+        fields_for_role = quiz_fields if current_user.has_role('admin') else student_quiz_fields
         if quiz_id:
             quiz = Quiz.query.options(
                 joinedload(Quiz.chapter).joinedload(Chapter.subject),
@@ -40,13 +59,13 @@ class QuizResource(Resource):
             ).get(quiz_id)
             if not quiz:
                 return {"message": f"Quiz with ID {quiz_id} not found"}, 404
-            return marshal(quiz, quiz_fields)
+            return marshal(quiz, fields_for_role)
 
         quizzes = Quiz.query.options(
             joinedload(Quiz.chapter).joinedload(Chapter.subject),
             joinedload(Quiz.questions)
         ).all()
-        return marshal(quizzes, quiz_fields), 200
+        return marshal(quizzes, fields_for_role), 200
 
     @auth_required('token')
     @roles_required('admin')
@@ -97,10 +116,13 @@ class QuizResource(Resource):
         if args['title']:
             quiz.title = args['title']
 
+        moved_from_subject_id = None
         if args['chapter_id']:
             chapter = Chapter.query.get(args['chapter_id'])
             if not chapter:
                 return {"message": f"Chapter with ID {args['chapter_id']} not found"}, 404
+            if chapter.subject_id != quiz.chapter.subject_id:
+                moved_from_subject_id = quiz.chapter.subject_id
             quiz.chapter_id = args['chapter_id']
         if args['date_of_quiz']:
             try:
@@ -121,6 +143,12 @@ class QuizResource(Resource):
         if args['is_active'] is not None:
             quiz.is_active = args['is_active']
 
+        if moved_from_subject_id:
+            # The quiz's attempts now count towards another subject
+            db.session.flush()
+            rebuild_subject_stats(moved_from_subject_id)
+            rebuild_subject_stats(chapter.subject_id)
+
         db.session.commit()
 
         return {
@@ -135,7 +163,11 @@ class QuizResource(Resource):
         if not quiz:
             return {"message": f"Quiz with ID {quiz_id} not found"}, 404
 
+        subject_id = quiz.chapter.subject_id
         db.session.delete(quiz)
+        db.session.flush()
+        # Its attempts went with it
+        rebuild_subject_stats(subject_id)
         db.session.commit()
 
         return {"message": f"Quiz with ID {quiz_id} deleted successfully"}, 200
@@ -1,11 +1,22 @@
-from flask import jsonify
-from flask_restful import Resource, marshal_with, reqparse, fields
+from flask import Response, abort, jsonify
+from flask_restful import Resource, marshal, marshal_with, reqparse, fields
 from flask_security import auth_required, roles_required
-from ...data.models import Subject
+from sqlalchemy.orm import selectinload
+from ...data.models import Chapter, Quiz, Subject
 from ...data.database import db
+from ...data.subject_tree import get_encoded_subjects, get_subject_ids
+from ...representations import dumps
+from ...etags import CATALOG_TAGS, conditional
 
 from .ChapterResource import chapter_fields
 
+# Everything subject_fields marshals, loaded level by level in a fixed number of queries
+subject_tree_options = (
+    selectinload(Subject.chapters)
+    .selectinload(Chapter.quizzes)
+    .selectinload(Quiz.questions),
+)
+
 subject_fields = {
     'id': fields.Integer,
     'name': fields.String,
@@ -15,6 +26,12 @@ subject_fields = {
 }
 
 
+def encode_subject_trees(subject_ids):
+    """Marshal and JSON-encode each subject's full tree, loaded in one batch of eager queries."""
+    subjects = Subject.query.options(*subject_tree_options).filter(Subject.id.in_(subject_ids)).all()
+    return {subject.id: dumps(marshal(subject, subject_fields)) for subject in subjects}
+
+
 class SubjectResource(Resource):
     parser = reqparse.RequestParser(bundle_errors=True)
     parser.add_argument('name', type=str, required=True, help="Subject name is required!")
@@ -23,13 +40,18 @@ class SubjectResource(Resource):
 
     @auth_required('token')
     @roles_required('admin')
-    @marshal_with(subject_fields)
+    @conditional(tags=lambda subject_id=None: CATALOG_TAGS)
     def get(self, subject_id=None):
+        # Served from pre-encoded per-subject JSON; only subjects changed since are rebuilt
         if subject_id:
-            subject = Subject.query.filter(Subject.id == subject_id).first_or_404(f"Subject with subject id {subject_id} does not exist.")
-            return subject
-        subjects = Subject.query.all()
-        return subjects, 201
+            encoded = get_encoded_subjects([subject_id], encode_subject_trees)
+            if subject_id not in encoded:
+                abort(404, f"Subject with subject id {subject_id} does not exist.")
+            return Response(encoded[subject_id], mimetype='application/json')
+        subject_ids = get_subject_ids()
+        encoded = get_encoded_subjects(subject_ids, encode_subject_trees)
+        body = b'[' + b','.join(encoded[subject_id] for subject_id in subject_ids if subject_id in encoded) + b']'
+        return Response(body, status=201, mimetype='application/json')
 
     @auth_required('token')
     @roles_required('admin')
@@ -56,7 +78,7 @@ class SubjectResource(Resource):
     @roles_required('admin')
     @marshal_with(subject_fields)
     def put(self, subject_id):
-        subject = Subject.query.filter(Subject.id==subject_id).first()
+        subject = Subject.query.options(*subject_tree_options).filter(Subject.id==subject_id).first()
         if not subject:
             return jsonify({
                 "message": "Subject doesn't exist"
@@ -1,47 +1,66 @@
+from flask import request
 from flask_restful import Resource
 from flask_security import auth_required, roles_required
-from ...data.models import Role, User, roles_users
+from sqlalchemy.orm import selectinload
+from ...data.models import User
 from ...data.database import db
-from ...data.data_access import get_all_users
-from application import cache
+from ...data.data_access import USER_SORT_COLUMNS, student_users_query, user_to_dict
+from ...etags import conditional
 
 class UserListResource(Resource):
+    # students for the admin users page, searched, sorted and paginated in SQL
+
+    MAX_PER_PAGE = 100
+
     @auth_required('token')
     @roles_required('admin')
+    @conditional(tags=lambda: ('users',))
     def get(self):
-        users = get_all_users()
-        return [{
-            'id': user.id,
-            'email': user.email,
-            'full_name': user.full_name,
-            'qualification': user.qualification,
-            'dob': user.dob.isoformat() if user.dob else None,
-            'active': user.active,
-            'roles': [role.name for role in user.roles]
-        } for user in users], 200
+        """
+        q: email or full name prefix (case-insensitive); active: true/false;
+        sort: id, email or full_name, order: asc/desc; page and per_page (at most 100) paginate.
+        """
+        search = request.args.get('q', '').strip()
+        active = request.args.get('active')
+        sort = request.args.get('sort', 'id')
+        order = request.args.get('order', 'asc').lower()
+        page = request.args.get('page', 1, type=int)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), self.MAX_PER_PAGE)
+
+        if sort not in USER_SORT_COLUMNS:
+            return {"message": f"Invalid sort, use one of: {', '.join(USER_SORT_COLUMNS)}"}, 400
+        if order not in ('asc', 'desc'):
+            return {"message": "Invalid order, use asc or desc"}, 400
+        if active is not None:
+            active = active.lower() in ['true', 'on', '1']
+
+        paginated = student_users_query(search, active, sort, order == 'desc').paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+
+        return {
+            "users": [user_to_dict(user) for user in paginated.items],
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "total": paginated.total,
+                "pages": paginated.pages,
+                "has_next": paginated.has_next,
+                "has_prev": paginated.has_prev
+            }
+        }, 200
 
 
 class UserDeactivateResource(Resource):
     @auth_required('token')
     @roles_required('admin')
     def put(self, user_id):
-        user = User.query.get_or_404(user_id)
+        user = User.query.options(selectinload(User.roles)).filter(User.id == user_id).first_or_404()
         if 'user' not in [role.name for role in user.roles]:
             return {'message': 'User does not have the "user" role'}, 400
         user.active = not user.active
         db.session.commit()
-        db.session.refresh(user)
-        cache.delete_memoized(get_all_users)
-        all_users = User.query.join(roles_users).join(Role).filter(Role.name == 'user').all()
         return {
-            'message': f'User {user.email} deactivated successfully',
-            'users': [{
-                'id': u.id,
-                'email': u.email,
-                'full_name': u.full_name,
-                'qualification': u.qualification,
-                'dob': u.dob.isoformat() if u.dob else None,
-                'active': u.active,
-                'roles': [role.name for role in u.roles]
-            } for u in all_users]
+            'message': f'User {user.email} {"activated" if user.active else "deactivated"} successfully',
+            'user': user_to_dict(user)
         }, 200
@@ -2,6 +2,7 @@ from .SubjectResource import SubjectResource
 from .ChapterResource import ChapterResource
 from .QuestionResource import QuestionResource
 from .QuizResource import QuizResource
+from .QuizCatalogResource import QuizCatalogResource
 from .UserResource import UserDeactivateResource, UserListResource
 
-__all__ = ['SubjectResource', 'ChapterResource', 'QuestionResource', 'QuizResource', 'UserDeactivateResource', 'UserListResource']
+__all__ = ['SubjectResource', 'ChapterResource', 'QuestionResource', 'QuizResource', 'QuizCatalogResource', 'UserDeactivateResource', 'UserListResource']
@@ -1,21 +1,63 @@
-from time import perf_counter_ns
-
-from flask import request, jsonify
+from flask import Response, current_app, request, jsonify, stream_with_context
 from flask_login import current_user
 from flask_restful import fields, marshal_with, Resource
 from flask_security import auth_required, roles_accepted
 from datetime import datetime
+from sqlalchemy import insert, select
 from sqlalchemy.exc import SQLAlchemyError
 
 from application.data.models import Chapter, QuizAttempt, Subject, User, Quiz, db
-from application.tasks import export_user_attempts_csv
+from application.tasks import export_all_attempts_csv, export_user_attempts_csv
 from application.data.data_access import (
     get_quiz_attempt_by_id,
-    get_all_quiz_attempts,
-    get_quiz_attempts_by_user,
-    get_quiz_attempts_with_everything,
     get_quiz_attempts_by_user_ordered_by_timestamp_desc
 )
+from application.data.answer_keys import get_answer_key, score_answer_sheets, score_answers
+from application.data.cache_events import mark_stale
+from application.data.drafts import DraftStoreUnavailable, delete_draft, get_draft, save_draft
+from application.data.exports import InvalidExportLink, iter_csv_chunks, iter_ndjson_chunks, read_export_link_token
+from application.data.pagination import InvalidCursor
+from application.data.submissions import (
+    SubmissionQueueUnavailable,
+    enqueue_submission,
+    get_submission_status,
+    new_submission_id
+)
+from application.data.aggregates import get_subject_stats, get_user_subject_totals
+from application.data.subject_stats import get_subject_id_for_quiz, record_attempt, record_attempts, remove_attempt
+from application.pagination import paginate_newest_first
+
+def attempt_rows_query(with_user=True):
+    """
+    Column query behind the attempt listings. The quiz title (and user email)
+    come from joins in the same statement, so a page never hydrates ORM objects.
+    """
+    columns = [
+        QuizAttempt.id,
+        QuizAttempt.user_id,
+        QuizAttempt.quiz_id,
+        QuizAttempt.timestamp,
+        QuizAttempt.total_score,
+        QuizAttempt.max_score,
+        QuizAttempt.percentage,
+        Quiz.title.label('quiz_title')
+    ]
+    if with_user:
+        columns.append(User.email.label('user_name'))
+
+    query = db.session.query(*columns).select_from(QuizAttempt).join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+    if with_user:
+        query = query.join(User, QuizAttempt.user_id == User.id)
+    return query
+
+
+def _discard_draft(user_id, quiz_id, draft):
+    if draft:
+        try:
+            delete_draft(user_id, quiz_id)
+        except DraftStoreUnavailable:
+            pass  # It expires with the quiz anyway
+
 
 class QuizAttemptResource(Resource):
     # Individual quiz attempt
@@ -24,23 +66,15 @@ class QuizAttemptResource(Resource):
     def get(self, attempt_id):
         try:
             attempt = get_quiz_attempt_by_id(attempt_id)
+            if not attempt:
+                return {'message': 'Quiz attempt not found'}, 404
 
             # Users own attempts
             user = current_user
-            if user.has_role('admin') and attempt.user_id != user.id:
+            if user.has_role('admin') and attempt['user_id'] != user.id:
                 return {'message': 'Access denied'}, 403
 
-            return {
-                'id': attempt.id,
-                'user_id': attempt.user_id,
-                'quiz_id': attempt.quiz_id,
-                'timestamp': attempt.timestamp.isoformat(),
-                'total_score': attempt.total_score,
-                'max_score': attempt.max_score,
-                'percentage': attempt.percentage,
-                'user_name': attempt.user.email if attempt.user else None,
-                'quiz_title': attempt.quiz.title if attempt.quiz else None
-            }, 200
+            return attempt, 200
 
         except Exception as e:
             return {'message': f'Error retrieving quiz attempt: {str(e)}'}, 500
@@ -50,11 +84,17 @@ class QuizAttemptResource(Resource):
     @roles_accepted('admin')
     def delete(self, attempt_id):
         try:
-            attempt = get_quiz_attempt_by_id(attempt_id)
+            # Load fresh from the session, the stats update needs the live row
+            attempt = db.session.get(QuizAttempt, attempt_id)
             if not attempt:
                 return {'message': 'Quiz attempt not found'}, 404
 
+            subject_id = get_subject_id_for_quiz(attempt.quiz_id)
+            percentage = attempt.percentage
+
             db.session.delete(attempt)
+            db.session.flush()
+            remove_attempt(subject_id, percentage)
             db.session.commit()
 
             return {'message': 'Quiz attempt deleted successfully'}, 200
@@ -74,49 +114,39 @@ class QuizAttemptsResource(Resource):
             user = current_user
             user_id = request.args.get('user_id', type=int)
             quiz_id = request.args.get('quiz_id', type=int)
-            page = request.args.get('page', 1, type=int)
-            per_page = request.args.get('per_page', 10, type=int)
 
             if user.has_role('admin'):
-                query = QuizAttempt.query
+                query = attempt_rows_query()
             else:
                 # users can only see their own attempts, admin can see all
-                query = QuizAttempt.query.filter_by(user_id=user.id)
+                query = attempt_rows_query().filter(QuizAttempt.user_id == user.id)
 
             # filters
             if user_id and user.has_role('admin'):
-                query = query.filter_by(user_id=user_id)
+                query = query.filter(QuizAttempt.user_id == user_id)
             if quiz_id:
-                query = query.filter_by(quiz_id=quiz_id)
-            # Ordering
-            query = query.order_by(QuizAttempt.timestamp.desc())
-            paginated = query.paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False
-            )
+                query = query.filter(QuizAttempt.quiz_id == quiz_id)
+
+            try:
+                items, pagination = paginate_newest_first(query, QuizAttempt.timestamp, QuizAttempt.id)
+            except InvalidCursor as e:
+                return {'message': str(e)}, 400
+
             attempts = [{
                 'id': attempt.id,
                 'user_id': attempt.user_id,
                 'quiz_id': attempt.quiz_id,
-                'timestamp': attempt.timestamp.isoformat(),
+                'timestamp': attempt.timestamp,
                 'total_score': attempt.total_score,
                 'max_score': attempt.max_score,
                 'percentage': attempt.percentage,
-                'user_name': attempt.user.email if attempt.user else None,
-                'quiz_title': attempt.quiz.title if attempt.quiz else None
-            } for attempt in paginated.items]
+                'user_name': attempt.user_name,
+                'quiz_title': attempt.quiz_title
+            } for attempt in items]
 
             return {
                 'attempts': attempts,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': paginated.total,
-                    'pages': paginated.pages,
-                    'has_next': paginated.has_next,
-                    'has_prev': paginated.has_prev
-                }
+                'pagination': pagination
             }, 200
 
         except Exception as e:
@@ -129,38 +159,76 @@ class QuizAttemptsResource(Resource):
             data = request.get_json()
 
             # 1. Validate input
-            if not data or 'quiz_id' not in data or 'answers' not in data:
-                return {'message': 'Missing quiz_id or answers in request'}, 400
+            if not data or 'quiz_id' not in data:
+                return {'message': 'Missing quiz_id in request'}, 400
 
-            quiz_id = data.get('quiz_id')
+            try:
+                quiz_id = int(data.get('quiz_id'))
+            except (ValueError, TypeError):
+                return {'message': 'Invalid quiz_id'}, 400
             user_answers = data.get('answers') # e.g., {"question_id": "selected_option"}
+            if user_answers is not None and not isinstance(user_answers, dict):
+                return {'message': 'Invalid answers'}, 400
 
-            # 2. Fetch the quiz and its questions from the database
-            quiz = Quiz.query.options(db.joinedload(Quiz.questions)).get(quiz_id)
-            if not quiz:
+            # 2. Fetch the quiz's answer key (cached, the questions table is not read)
+            answer_key = get_answer_key(quiz_id)
+            if not answer_key:
                 return {'message': 'Quiz not found'}, 404
 
-            if not quiz.questions:
+            if not answer_key.question_ids:
                 return {'message': 'This quiz has no questions'}, 400
 
-            # 3. Calculate the score securely on the server
-            total_score = 0
-            max_score = len(quiz.questions)
-
-            for question in quiz.questions:
-                # User's answer for the current question (handle string keys from JSON)
-                user_answer_str = user_answers.get(str(question.id))
-
-                if user_answer_str is not None:
-                    try:
-                        user_answer_int = int(user_answer_str)
-                        if user_answer_int == question.correct_option:
-                            total_score += 1
-                    except (ValueError, TypeError):
-                        # Ignore if the answer is not a valid integer
-                        continue
+            # Answers autosaved during the quiz; any sent with the submission win
+            try:
+                draft = get_draft(user.id, quiz_id)
+            except DraftStoreUnavailable:
+                if user_answers is None:
+                    return {'message': 'Saved answers are unavailable, submit them with the request'}, 503
+                draft = {}
+            if user_answers is None and not draft:
+                return {'message': 'Missing answers in request'}, 400
+            user_answers = {**draft, **(user_answers or {})}
 
-            percentage = (total_score / max_score) * 100 if max_score > 0 else 0
+            # 3. Calculate the score securely on the server
+            total_score = score_answers(answer_key, user_answers)
+            max_score = len(answer_key.question_ids)
+
+            percentage = round((total_score / max_score) * 100 if max_score > 0 else 0, 2)
+            timestamp = datetime.now()
+
+            # 4. At exam peaks, queue the scored attempt for a batched write instead of committing here
+            if current_app.config['SUBMISSION_WRITE_BEHIND']:
+                submission_id = new_submission_id()
+                try:
+                    enqueue_submission({
+                        'submission_id': submission_id,
+                        'user_id': user.id,
+                        'quiz_id': quiz_id,
+                        'subject_id': answer_key.subject_id,
+                        'total_score': total_score,
+                        'max_score': max_score,
+                        'percentage': percentage,
+                        'timestamp': timestamp.isoformat()
+                    })
+                except SubmissionQueueUnavailable as e:
+                    current_app.logger.warning("Submission queue unavailable, writing attempt directly: %s", e)
+                else:
+                    _discard_draft(user.id, quiz_id, draft)
+                    return {
+                        'message': 'Quiz attempt accepted',
+                        'submission_id': submission_id,
+                        'status': 'queued',
+                        'status_url': f'/api/quiz-attempts/submissions/{submission_id}',
+                        'attempt': {
+                            'id': None,
+                            'user_id': user.id,
+                            'quiz_id': quiz_id,
+                            'timestamp': timestamp.isoformat(),
+                            'total_score': total_score,
+                            'max_score': max_score,
+                            'percentage': percentage
+                        }
+                    }, 202
 
             # 5. Create and save the new QuizAttempt
             attempt = QuizAttempt(
@@ -168,13 +236,17 @@ class QuizAttemptsResource(Resource):
                 quiz_id=quiz_id,
                 total_score=total_score,
                 max_score=max_score,
-                percentage=round(percentage, 2),
-                timestamp=datetime.now()
+                percentage=percentage,
+                timestamp=timestamp
             )
 
             db.session.add(attempt)
+            # Keep the subject aggregate in the same transaction as the attempt
+            record_attempt(answer_key.subject_id, attempt.percentage)
             db.session.commit()
 
+            _discard_draft(user.id, quiz_id, draft)
+
             # 6. Return the result to the frontend
             return {
                 'message': 'Quiz attempt created successfully',
@@ -195,6 +267,186 @@ class QuizAttemptsResource(Resource):
             return {'message': f'An unexpected error occurred: {str(e)}'}, 500
 
 
+class QuizAttemptSubmissionResource(Resource):
+    # status of a write-behind submission
+
+    @auth_required()
+    def get(self, submission_id):
+        try:
+            status = get_submission_status(submission_id)
+        except SubmissionQueueUnavailable:
+            return {'message': 'Submission queue unavailable'}, 503
+
+        if not status or (status['user_id'] != current_user.id and not current_user.has_role('admin')):
+            return {'message': 'Submission not found'}, 404
+        return status, 200
+
+
+class QuizAttemptDraftResource(Resource):
+    # autosaved answers while a quiz is in progress (Redis only, no SQL)
+
+    @auth_required()
+    def get(self, quiz_id):
+        """The answers saved so far, e.g. to restore a quiz after a reload."""
+        try:
+            return {'quiz_id': quiz_id, 'answers': get_draft(current_user.id, quiz_id)}, 200
+        except DraftStoreUnavailable:
+            return {'message': 'Draft store unavailable'}, 503
+
+    @auth_required()
+    def put(self, quiz_id):
+        """Merge {"answers": {"question_id": option}} into the draft."""
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('answers'), dict):
+            return {'message': 'Missing answers in request'}, 400
+
+        answer_key = get_answer_key(quiz_id)
+        if not answer_key:
+            return {'message': 'Quiz not found'}, 404
+
+        question_ids = {str(question_id) for question_id in answer_key.question_ids}
+        answers = {}
+        for question_id, option in data['answers'].items():
+            if question_id not in question_ids:
+                return {'message': f'Question {question_id} is not part of this quiz'}, 400
+            try:
+                option = int(option)
+            except (ValueError, TypeError):
+                return {'message': f'Invalid option for question {question_id}'}, 400
+            if option not in (1, 2, 3, 4):
+                return {'message': f'Invalid option for question {question_id}'}, 400
+            answers[question_id] = option
+
+        if not answers:
+            return {'message': 'Missing answers in request'}, 400
+
+        try:
+            expires_in = save_draft(current_user.id, answer_key, answers)
+        except DraftStoreUnavailable:
+            return {'message': 'Draft store unavailable'}, 503
+        return {'quiz_id': quiz_id, 'saved': len(answers), 'expires_in': expires_in}, 200
+
+    @auth_required()
+    def delete(self, quiz_id):
+        try:
+            delete_draft(current_user.id, quiz_id)
+        except DraftStoreUnavailable:
+            return {'message': 'Draft store unavailable'}, 503
+        return {'message': 'Draft discarded'}, 200
+
+
+class QuizAttemptsBatchResource(Resource):
+    # scoring many answer sheets for one quiz (offline exams, imports)
+
+    @auth_required()
+    @roles_accepted('admin')
+    def post(self):
+        """
+        Score and record a batch of submissions for one quiz in one transaction.
+        Body: {"quiz_id": 1, "submissions": [{"user_id": 2, "answers": {...}}, ...]}.
+        Returns a result per submission, in order; invalid ones are skipped.
+        """
+        try:
+            data = request.get_json()
+
+            if not data or 'quiz_id' not in data or not isinstance(data.get('submissions'), list):
+                return {'message': 'Missing quiz_id or submissions in request'}, 400
+
+            try:
+                quiz_id = int(data.get('quiz_id'))
+            except (ValueError, TypeError):
+                return {'message': 'Invalid quiz_id'}, 400
+
+            submissions = data['submissions']
+            limit = current_app.config['QUIZ_ATTEMPT_BATCH_LIMIT']
+            if not submissions:
+                return {'message': 'No submissions in request'}, 400
+            if len(submissions) > limit:
+                return {'message': f'A batch can hold at most {limit} submissions'}, 400
+
+            answer_key = get_answer_key(quiz_id)
+            if not answer_key:
+                return {'message': 'Quiz not found'}, 404
+
+            if not answer_key.question_ids:
+                return {'message': 'This quiz has no questions'}, 400
+
+            # Validate every submission up front; all user ids are checked in one query
+            results = []
+            user_ids = set()
+            for index, submission in enumerate(submissions):
+                result = {'index': index, 'status': 'invalid'}
+                results.append(result)
+                if not isinstance(submission, dict) or not isinstance(submission.get('answers'), dict):
+                    result['message'] = 'Missing answers'
+                    continue
+                try:
+                    result['user_id'] = int(submission.get('user_id'))
+                except (ValueError, TypeError):
+                    result['message'] = 'Invalid user_id'
+                    continue
+                user_ids.add(result['user_id'])
+
+            known_user_ids = set(db.session.scalars(select(User.id).where(User.id.in_(user_ids)))) if user_ids else set()
+            valid = []
+            for result in results:
+                if 'user_id' not in result:
+                    continue
+                if result['user_id'] not in known_user_ids:
+                    result['message'] = 'User not found'
+                    continue
+                valid.append(result)
+
+            if not valid:
+                return {'message': 'No valid submissions in request', 'results': results}, 400
+
+            # Score every sheet at once
+            scores = score_answer_sheets(answer_key, [submissions[result['index']]['answers'] for result in valid])
+            max_score = len(answer_key.question_ids)
+            percentages = (scores / max_score * 100).round(2)
+
+            timestamp = datetime.now()
+            rows = [{
+                'user_id': result['user_id'],
+                'quiz_id': quiz_id,
+                'total_score': int(score),
+                'max_score': max_score,
+                'percentage': float(percentage),
+                'timestamp': timestamp
+            } for result, score, percentage in zip(valid, scores, percentages)]
+
+            # One executemany INSERT; the ids come back in parameter order
+            attempt_ids = db.session.scalars(
+                insert(QuizAttempt).returning(QuizAttempt.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            record_attempts(answer_key.subject_id, percentages)
+            # The bulk insert skips the unit of work, so queue its cache tags by hand
+            mark_stale(db.session, 'attempts', *{f"attempts:user:{row['user_id']}" for row in rows})
+            db.session.commit()
+
+            for result, row, attempt_id in zip(valid, rows, attempt_ids):
+                result.update({
+                    'status': 'created',
+                    'attempt_id': attempt_id,
+                    'total_score': row['total_score'],
+                    'max_score': row['max_score'],
+                    'percentage': row['percentage']
+                })
+
+            return {
+                'message': f'{len(valid)} of {len(submissions)} quiz attempts created',
+                'quiz_id': quiz_id,
+                'timestamp': timestamp.isoformat(),
+                'results': results
+            }, 201
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return {'message': f'Database error: {str(e)}'}, 500
+        except Exception as e:
+            return {'message': f'An unexpected error occurred: {str(e)}'}, 500
+
+
 class UserQuizAttemptsResource(Resource):
     # getting quiz attempts by user
 
@@ -210,45 +462,32 @@ class UserQuizAttemptsResource(Resource):
 
             # query params
             quiz_id = request.args.get('quiz_id', type=int)
-            page = request.args.get('page', 1, type=int)
-            per_page = request.args.get('per_page', 10, type=int)
 
-            query = QuizAttempt.query.filter_by(user_id=user_id)
+            query = attempt_rows_query(with_user=False).filter(QuizAttempt.user_id == user_id)
 
             if quiz_id:
-                query = query.filter_by(quiz_id=quiz_id)
-            # Arrange according to time
-            query = query.order_by(QuizAttempt.timestamp.desc())
-
-            # Pagination
-            paginated = query.paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False
-            )
+                query = query.filter(QuizAttempt.quiz_id == quiz_id)
+
+            try:
+                items, pagination = paginate_newest_first(query, QuizAttempt.timestamp, QuizAttempt.id)
+            except InvalidCursor as e:
+                return {'message': str(e)}, 400
 
             attempts = [{
                 'id': attempt.id,
                 'quiz_id': attempt.quiz_id,
-                'timestamp': attempt.timestamp.isoformat(),
+                'timestamp': attempt.timestamp,
                 'total_score': attempt.total_score,
                 'max_score': attempt.max_score,
                 'percentage': attempt.percentage,
-                'quiz_title': attempt.quiz.title if attempt.quiz else None
-            } for attempt in paginated.items]
+                'quiz_title': attempt.quiz_title
+            } for attempt in items]
 
             return {
                 'user_id': user_id,
                 'user_name': user.email,
                 'attempts': attempts,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': paginated.total,
-                    'pages': paginated.pages,
-                    'has_next': paginated.has_next,
-                    'has_prev': paginated.has_prev
-                }
+                'pagination': pagination
             }, 200
 
         except Exception as e:
@@ -265,18 +504,27 @@ class UserStatsResource(Resource):
             if not current_user.has_role('admin') and current_user.id != user_id:
                 return {'message': 'Access denied'}, 403
             user = User.query.get_or_404(user_id)
-            query = get_quiz_attempts_by_user_ordered_by_timestamp_desc(user_id)
+            rows = get_quiz_attempts_by_user_ordered_by_timestamp_desc(user_id)
 
             attempts = [{
-                'id': attempt.id,
-                'timestamp': attempt.timestamp.isoformat(),
-                'subject_name': attempt.quiz.chapter.subject.name if attempt.quiz and attempt.quiz.chapter else None
-            } for attempt in query]
+                'id': attempt_id,
+                'timestamp': timestamp,
+                'subject_name': subject_name
+            } for attempt_id, timestamp, subject_name in rows]
+
+            # Per-subject summary is grouped in SQL
+            subjects = [{
+                'subject_name': subject_name,
+                'attempts': attempt_count,
+                'average_percentage': round(average, 2),
+                'top_percentage': top_score
+            } for subject_name, attempt_count, _, _, average, top_score in get_user_subject_totals(user_id)]
 
             return {
                 'user_id': user_id,
                 'user_name': user.email,
                 'attempts': attempts,
+                'subjects': subjects,
             }, 200
 
         except Exception as e:
@@ -290,39 +538,19 @@ class QuizAttemptsStatsResource(Resource):
     @roles_accepted('admin')
     def get(self):
         try:
-            # Get all quiz attempts with quiz and subject information
-
-            start = perf_counter_ns()
-            print("╭──────────────────────────────────────╮")
-            attempts = get_quiz_attempts_with_everything()
-            stop = perf_counter_ns()
-            x = f"Time Taken: {stop - start} ns"
-            print(f"│{x.center(38)}│")
-            print("╰──────────────────────────────────────╯")
-            # Calculate subject-wise top scores
+            # Reads the per-subject aggregate, one row per subject (timed by /metrics)
+            subject_stats = get_subject_stats()
+
             subject_top_scores = {}
             subject_attempts = {}
-
-            for attempt in attempts:
-                subject_name = attempt.quiz.chapter.subject.name
-
-                # Track top scores per subject
-                if subject_name not in subject_top_scores:
-                    subject_top_scores[subject_name] = attempt.percentage
-                else:
-                    if attempt.percentage > subject_top_scores[subject_name]:
-                        subject_top_scores[subject_name] = attempt.percentage
-
-                # Count attempts per subject
-                if subject_name not in subject_attempts:
-                    subject_attempts[subject_name] = 1
-                else:
-                    subject_attempts[subject_name] += 1
+            for subject_name, attempt_count, top_score in subject_stats:
+                subject_top_scores[subject_name] = top_score
+                subject_attempts[subject_name] = attempt_count
 
             return {
                 'subject_top_scores': subject_top_scores,
                 'subject_attempts': subject_attempts,
-                'total_attempts': len(attempts)
+                'total_attempts': sum(subject_attempts.values())
             }
 
         except Exception as e:
@@ -331,10 +559,62 @@ class QuizAttemptsStatsResource(Resource):
 class ExportUserAttemptsResource(Resource):
     @auth_required()
     def post(self):
-        """Triggers a background job to export user's quiz attempts as a CSV."""
+        """
+        Triggers a background job to export user's quiz attempts as a CSV.
+        Admins can pass ?scope=all to export every user's attempts instead.
+        """
         try:
             user = current_user
+            if request.args.get('scope') == 'all':
+                if not user.has_role('admin'):
+                    return {'message': 'Access denied'}, 403
+                export_all_attempts_csv.delay(user.id)
+                return {'message': 'All quiz attempts are being exported. You will receive an email with the CSV file shortly.'}, 202
+
             export_user_attempts_csv.delay(user.id)
             return {'message': 'Your quiz history is being exported. You will receive an email with the CSV file shortly.'}, 202
         except Exception as e:
             return {'message': f'An unexpected error occurred: {str(e)}'}, 500
+
+
+class ExportAttemptsDownloadResource(Resource):
+    # streaming export, no Celery round trip
+
+    formats = {
+        'csv': (iter_csv_chunks, 'text/csv'),
+        'ndjson': (iter_ndjson_chunks, 'application/x-ndjson'),
+    }
+
+    def get(self, export_format):
+        """
+        Streams the user's quiz attempts as CSV or NDJSON, newest first.
+        Admins can pass ?scope=all to stream every user's attempts. ?link= takes
+        the signed token from an export email in place of the auth header.
+        """
+        link = request.args.get('link')
+        if link is None:
+            return self._get_authenticated(export_format)
+        try:
+            user_id = read_export_link_token(link)
+        except InvalidExportLink as e:
+            return {'message': str(e)}, 403
+        return self._stream(export_format, user_id)
+
+    @auth_required()
+    def _get_authenticated(self, export_format):
+        user = current_user
+        user_id = user.id
+        if request.args.get('scope') == 'all':
+            if not user.has_role('admin'):
+                return {'message': 'Access denied'}, 403
+            user_id = None
+        return self._stream(export_format, user_id)
+
+    def _stream(self, export_format, user_id):
+        chunks, mimetype = self.formats[export_format]
+        # Rows are read from a yield_per cursor while the response is sent, chunked
+        return Response(
+            stream_with_context(chunks(user_id)),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=quiz_attempts.{export_format}'}
+        )
@@ -1,102 +1,148 @@
-from datetime import datetime, timedelta
-from flask_mail import Mail, Message
-from sqlalchemy import func
-import io
-import csv
-
-from application.data.models import User, Quiz, QuizAttempt, Subject, Chapter
+from datetime import datetime, time, timedelta
+from itertools import groupby
+from flask_mail import Message
+from sqlalchemy import select
+
+from application.data.aggregates import get_user_subject_totals, iter_user_subject_totals
+from application.data.exports import export_link_token, export_size, write_attempts_csv
+from application.data.submissions import SubmissionStoreUnavailable, drain_submissions
+from application.emails import render_attempts_export, render_performance_report, render_reminder, render_reminder_quiz_list
+from application.mailer import get_smtp_pool
+from application.data.models import User, Quiz, Chapter, Subject
 from application.data.database import db
 
 # Import celery instance
 from celery_config import celery_app, flask_app
 
+def _chunked(rows, size):
+    """Group an iterable into lists of at most size items."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _reminder_quiz_list(quiz_ids):
+    """The rendered quiz block for the given quizzes, shared by every reminder in a batch."""
+    quizzes = db.session.execute(
+        select(
+            Quiz.title,
+            Subject.name.label('subject_name'),
+            Chapter.name.label('chapter_name'),
+            Quiz.date_of_quiz,
+            Quiz.time_duration
+        )
+        .join(Chapter, Quiz.chapter_id == Chapter.id)
+        .join(Subject, Chapter.subject_id == Subject.id)
+        .where(Quiz.id.in_(quiz_ids))
+        .order_by(Quiz.date_of_quiz)
+    ).all()
+    return render_reminder_quiz_list(quizzes) if quizzes else None
+
+def _reminder_message(email, full_name, quiz_list):
+    return Message(
+        subject="Quiz Reminder - Upcoming Quizzes",
+        recipients=[email],
+        html=render_reminder(full_name, quiz_list)
+    )
+
 @celery_app.task
 def send_daily_quiz_reminders():
-    """Send daily quiz reminders to users about upcoming quizzes."""
+    """
+    Send daily quiz reminders to users about upcoming quizzes. Active users
+    are streamed from the database and handed out in batches of
+    EMAIL_BATCH_SIZE, one send_quiz_reminder_batch task per batch.
+    """
     try:
         print("[INFO] Starting daily quiz reminders task")
 
-        # Get quizzes scheduled for today and tomorrow
-        today = datetime.now().date()
-        tomorrow = today + timedelta(days=1)
+        # Get quizzes scheduled for today and tomorrow. A plain range on
+        # date_of_quiz (rather than date(date_of_quiz)) can use the index.
+        window_start = datetime.combine(datetime.now().date(), time.min)
+        window_end = window_start + timedelta(days=2)
 
-        upcoming_quizzes = Quiz.query.filter(
-            func.date(Quiz.date_of_quiz).between(today, tomorrow),
-            Quiz.is_active == True
-        ).all()
+        quiz_ids = db.session.scalars(select(Quiz.id).where(
+            Quiz.is_active == True,
+            Quiz.date_of_quiz >= window_start,
+            Quiz.date_of_quiz < window_end
+        )).all()
 
-        if not upcoming_quizzes:
+        if not quiz_ids:
             print("[INFO] No upcoming quizzes found for reminders")
             return "No upcoming quizzes"
 
-        # Get all active users
-        users = User.query.filter_by(active=True).all()
+        # Stream (id, email, full_name) of active users; the batch tasks don't query users again
+        recipients = db.session.execute(
+            select(User.id, User.email, User.full_name)
+            .where(User.active == True)
+            .order_by(User.id)
+            .execution_options(yield_per=flask_app.config['EMAIL_BATCH_SIZE'])
+        )
 
         reminder_count = 0
-        for user in users:
+        batch_count = 0
+        for batch in _chunked(recipients, flask_app.config['EMAIL_BATCH_SIZE']):
             try:
-                # Send email reminder
-                send_quiz_reminder_email.delay(user.id, [quiz.id for quiz in upcoming_quizzes])
-                reminder_count += 1
+                send_quiz_reminder_batch.delay([list(row) for row in batch], quiz_ids)
+                reminder_count += len(batch)
+                batch_count += 1
             except Exception as e:
-                print(f"[ERROR] Failed to send reminder to user {user.id}: {str(e)}")
+                print(f"[ERROR] Failed to queue reminders for users {batch[0].id}-{batch[-1].id}: {str(e)}")
 
-        print(f"[INFO] Sent {reminder_count} quiz reminders")
-        return f"Sent {reminder_count} quiz reminders"
+        print(f"[INFO] Queued {reminder_count} quiz reminders in {batch_count} batches")
+        return f"Queued {reminder_count} quiz reminders in {batch_count} batches"
 
     except Exception as e:
         print(f"[ERROR] Error in send_daily_quiz_reminders: {str(e)}")
         return f"Error: {str(e)}"
 
+@celery_app.task
+def send_quiz_reminder_batch(recipients, quiz_ids):
+    """
+    Send the quiz reminder to a batch of [user_id, email, full_name] recipients.
+    The quiz list is rendered once and every message goes over one SMTP connection.
+    """
+    try:
+        print(f"[INFO] Sending quiz reminders to {len(recipients)} users")
+
+        quiz_list = _reminder_quiz_list(quiz_ids)
+        if not quiz_list:
+            return "No quizzes to remind about"
+
+        sent = 0
+        smtp_pool = get_smtp_pool()
+        for user_id, email, full_name in recipients:
+            try:
+                smtp_pool.send(_reminder_message(email, full_name, quiz_list))
+                sent += 1
+            except Exception as e:
+                print(f"[ERROR] Failed to send reminder to user {user_id}: {str(e)}")
+
+        print(f"[INFO] Sent {sent} of {len(recipients)} quiz reminders")
+        return f"Sent {sent} of {len(recipients)} quiz reminders"
+
+    except Exception as e:
+        print(f"[ERROR] Error sending quiz reminder batch: {str(e)}")
+        return f"Error: {str(e)}"
+
 @celery_app.task
 def send_quiz_reminder_email(user_id, quiz_ids):
     """Send quiz reminder email to a specific user."""
     try:
         print(f"[INFO] Sending quiz reminder email to user {user_id}")
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return f"User {user_id} not found"
 
-        quizzes = Quiz.query.filter(Quiz.id.in_(quiz_ids)).all()
-
-        mail = Mail(flask_app)
-
-        # Create email content
-        quiz_list = ""
-        for quiz in quizzes:
-            quiz_list += f"""
-            <li>
-                <strong>{quiz.title}</strong><br>
-                Subject: {quiz.chapter.subject.name}<br>
-                Chapter: {quiz.chapter.name}<br>
-                Date: {quiz.date_of_quiz.strftime('%Y-%m-%d %H:%M')}<br>
-                Duration: {quiz.time_duration} minutes
-            </li><br>
-            """
-
-        html_body = f"""
-        <html>
-        <body>
-            <h2>Quiz Reminder</h2>
-            <p>Hello {user.full_name},</p>
-            <p>This is a friendly reminder about the following upcoming quizzes:</p>
-            <ul>
-                {quiz_list}
-            </ul>
-            <p>Don't forget to prepare and participate!</p>
-            <p>Best regards,<br>Quiz Master Team</p>
-        </body>
-        </html>
-        """
+        quiz_list = _reminder_quiz_list(quiz_ids)
+        if not quiz_list:
+            return "No quizzes to remind about"
 
-        msg = Message(
-            subject="Quiz Reminder - Upcoming Quizzes",
-            recipients=[user.email],
-            html=html_body
-        )
-
-        mail.send(msg)
+        get_smtp_pool().send(_reminder_message(user.email, user.full_name, quiz_list))
         print(f"[INFO] Quiz reminder sent to {user.email}")
         return f"Reminder sent to {user.email}"
 
@@ -104,131 +150,90 @@ def send_quiz_reminder_email(user_id, quiz_ids):
         print(f"[ERROR] Error sending quiz reminder email: {str(e)}")
         return f"Error: {str(e)}"
 
+def _performance_report_message(email, full_name, subjects):
+    return Message(
+        subject="Monthly Performance Report",
+        recipients=[email],
+        html=render_performance_report(full_name, subjects)
+    )
+
 @celery_app.task
 def send_monthly_performance_reports():
-    """Send monthly performance reports to all users."""
+    """
+    Send monthly performance reports to all users. One GROUP BY over the
+    last month's attempts is streamed per user and handed out in batches
+    of EMAIL_BATCH_SIZE reports, one send_performance_report_batch task each.
+    """
     try:
         print("[INFO] Starting monthly performance reports task")
 
-        # Get all active users
-        users = User.query.filter_by(active=True).all()
+        last_month = datetime.now() - timedelta(days=30)
+        batch_size = flask_app.config['EMAIL_BATCH_SIZE']
+        rows = iter_user_subject_totals(last_month, batch_size=batch_size)
+
+        # Rows arrive ordered by user, so each user's subjects are consecutive
+        reports = (
+            [user_id, email, full_name, [list(row[3:]) for row in user_rows if row[3] is not None]]
+            for (user_id, email, full_name), user_rows in groupby(rows, key=lambda row: row[:3])
+        )
 
         report_count = 0
-        for user in users:
+        batch_count = 0
+        for batch in _chunked(reports, batch_size):
             try:
-                # Generate and send performance report
-                send_performance_report_email.delay(user.id)
-                report_count += 1
+                send_performance_report_batch.delay(batch)
+                report_count += len(batch)
+                batch_count += 1
             except Exception as e:
-                print(f"[ERROR] Failed to send performance report to user {user.id}: {str(e)}")
+                print(f"[ERROR] Failed to queue performance reports for users {batch[0][0]}-{batch[-1][0]}: {str(e)}")
 
-        print(f"[INFO] Sent {report_count} performance reports")
-        return f"Sent {report_count} performance reports"
+        print(f"[INFO] Queued {report_count} performance reports in {batch_count} batches")
+        return f"Queued {report_count} performance reports in {batch_count} batches"
 
     except Exception as e:
         print(f"[ERROR] Error in send_monthly_performance_reports: {str(e)}")
         return f"Error: {str(e)}"
 
+@celery_app.task
+def send_performance_report_batch(reports):
+    """
+    Send a batch of monthly reports, each [user_id, email, full_name, subjects],
+    over one SMTP connection. Everything needed is in the message; nothing is queried.
+    """
+    try:
+        print(f"[INFO] Sending {len(reports)} performance reports")
+
+        sent = 0
+        smtp_pool = get_smtp_pool()
+        for user_id, email, full_name, subjects in reports:
+            try:
+                smtp_pool.send(_performance_report_message(email, full_name, subjects))
+                sent += 1
+            except Exception as e:
+                print(f"[ERROR] Failed to send performance report to user {user_id}: {str(e)}")
+
+        print(f"[INFO] Sent {sent} of {len(reports)} performance reports")
+        return f"Sent {sent} of {len(reports)} performance reports"
+
+    except Exception as e:
+        print(f"[ERROR] Error sending performance report batch: {str(e)}")
+        return f"Error: {str(e)}"
+
 @celery_app.task
 def send_performance_report_email(user_id):
     """Generate and send performance report email to a specific user."""
     try:
         print(f"[INFO] Generating performance report for user {user_id}")
 
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return f"User {user_id} not found"
 
-        # Get user's quiz attempts from last month
+        # Totals for the last month, grouped in SQL
         last_month = datetime.now() - timedelta(days=30)
-        attempts = QuizAttempt.query.filter(
-            QuizAttempt.user_id == user_id,
-            QuizAttempt.timestamp >= last_month
-        ).join(Quiz).join(Chapter).join(Subject).all()
-
-        if not attempts:
-            # Send "no activity" email
-            html_body = f"""
-            <html>
-            <body>
-                <h2>Monthly Performance Report</h2>
-                <p>Hello {user.full_name},</p>
-                <p>We haven't seen you taking any quizzes in the last month.</p>
-                <p>Why not give it a try? Check out our latest quizzes!</p>
-                <p>Best regards,<br>Quiz Master Team</p>
-            </body>
-            </html>
-            """
-        else:
-            # Calculate statistics
-            total_attempts = len(attempts)
-            total_score = sum(attempt.total_score for attempt in attempts)
-            max_possible_score = sum(attempt.max_score for attempt in attempts)
-            average_percentage = (total_score / max_possible_score * 100) if max_possible_score > 0 else 0
-
-            # Subject-wise performance
-            subject_stats = {}
-            for attempt in attempts:
-                subject = attempt.quiz.chapter.subject.name
-                if subject not in subject_stats:
-                    subject_stats[subject] = {
-                        'attempts': 0,
-                        'total_score': 0,
-                        'max_score': 0
-                    }
-                subject_stats[subject]['attempts'] += 1
-                subject_stats[subject]['total_score'] += attempt.total_score
-                subject_stats[subject]['max_score'] += attempt.max_score
-
-            subject_performance = ""
-            for subject, stats in subject_stats.items():
-                percentage = (stats['total_score'] / stats['max_score'] * 100) if stats['max_score'] > 0 else 0
-                subject_performance += f"""
-                <tr>
-                    <td>{subject}</td>
-                    <td>{stats['attempts']}</td>
-                    <td>{percentage:.1f}%</td>
-                </tr>
-                """
-
-            html_body = f"""
-            <html>
-            <body>
-                <h2>Monthly Performance Report</h2>
-                <p>Hello {user.full_name},</p>
-                <p>Here's your performance summary for the last month:</p>
-
-                <h3>Overall Statistics</h3>
-                <ul>
-                    <li>Total Quizzes Attempted: {total_attempts}</li>
-                    <li>Average Score: {average_percentage:.1f}%</li>
-                    <li>Total Points: {total_score}/{max_possible_score}</li>
-                </ul>
-
-                <h3>Subject-wise Performance</h3>
-                <table border="1" style="border-collapse: collapse; width: 100%;">
-                    <tr>
-                        <th>Subject</th>
-                        <th>Attempts</th>
-                        <th>Average Score</th>
-                    </tr>
-                    {subject_performance}
-                </table>
-
-                <p>Keep up the great work!</p>
-                <p>Best regards,<br>Quiz Master Team</p>
-            </body>
-            </html>
-            """
-
-        mail = Mail(flask_app)
-        msg = Message(
-            subject="Monthly Performance Report",
-            recipients=[user.email],
-            html=html_body
-        )
+        subjects = [row[:4] for row in get_user_subject_totals(user_id, since=last_month)]
 
-        mail.send(msg)
+        get_smtp_pool().send(_performance_report_message(user.email, user.full_name, subjects))
         print(f"[INFO] Performance report sent to {user.email}")
         return f"Performance report sent to {user.email}"
 
@@ -236,70 +241,114 @@ def send_performance_report_email(user_id):
         print(f"[ERROR] Error sending performance report: {str(e)}")
         return f"Error: {str(e)}"
 
+def _email_export(recipient, export, all_users=False):
+    """
+    Email an ExportFile as an attachment or, above EXPORT_ATTACHMENT_MAX_BYTES,
+    as a signed link to the streaming download, so a large export is never
+    read into memory. The file is closed afterwards.
+    """
+    try:
+        download_url = None
+        link_hours = flask_app.config['EXPORT_LINK_MAX_AGE'] // 3600
+        if export_size(export) > flask_app.config['EXPORT_ATTACHMENT_MAX_BYTES']:
+            token = export_link_token(recipient.id, all_users=all_users)
+            download_url = f"{flask_app.config['API_BASE_URL']}/api/quiz-attempts/export.csv?link={token}"
+
+        msg = Message(
+            subject="Your Quiz Attempts Export",
+            recipients=[recipient.email],
+            body=f"Download your quiz attempts within {link_hours} hours: {download_url}" if download_url
+                 else "Please find your quiz attempts history attached.",
+            html=render_attempts_export(all_users=all_users, download_url=download_url, link_hours=link_hours)
+        )
+        if download_url is None:
+            # SMTP needs the attachment in memory; it is at most EXPORT_ATTACHMENT_MAX_BYTES
+            msg.attach(export.filename, export.mimetype, export.file.read())
+        get_smtp_pool().send(msg)
+        return download_url
+    finally:
+        export.file.close()
+
 @celery_app.task
 def export_user_attempts_csv(user_id):
     """
-    Fetches all quiz attempts for a user, generates a CSV,
+    Streams all quiz attempts for a user into a CSV (gzipped when large)
     and emails it to them.
     """
     with flask_app.app_context():
         try:
-            user = User.query.get(user_id)
+            user = db.session.get(User, user_id)
             if not user:
                 print(f"[ERROR] User with ID {user_id} not found for CSV export.")
                 return
 
-            attempts = db.session.query(QuizAttempt).filter_by(user_id=user_id).join(Quiz).order_by(QuizAttempt.timestamp.desc()).all()
-
-            if not attempts:
+            export = write_attempts_csv(user_id)
+            if not export.row_count:
                 # Optionally, send an email notifying the user they have no attempts.
+                export.file.close()
                 print(f"[INFO] No quiz attempts found for user {user.email} to export.")
                 return
 
-            # Create CSV in-memory
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            # Write header
-            header = [
-                'Quiz Title', 'Subject', 'Chapter', 'Date Attempted',
-                'Score', 'Max Score', 'Percentage', 'Quiz Remarks'
-            ]
-            writer.writerow(header)
-
-            # Write data rows
-            for attempt in attempts:
-                row = [
-                    attempt.quiz.title,
-                    attempt.quiz.chapter.subject.name,
-                    attempt.quiz.chapter.name,
-                    attempt.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    attempt.total_score,
-                    attempt.max_score,
-                    f"{attempt.percentage:.2f}%",
-                    attempt.quiz.remarks
-                ]
-                writer.writerow(row)
-
-            csv_data = output.getvalue()
-            output.close()
-
-            # Send email with CSV attachment
-            mail = Mail(flask_app)
-            msg = Message(
-                subject="Your Quiz Attempts Export",
-                recipients=[user.email],
-                body="Please find your quiz attempts history attached.",
-                html="<p>Hello,</p><p>Please find your quiz attempts history attached in the CSV file.</p>"
-            )
-            msg.attach(
-                "quiz_attempts.csv",
-                "text/csv",
-                csv_data
-            )
-            mail.send(msg)
-            print(f"[INFO] Successfully sent quiz attempts CSV to {user.email}")
+            download_url = _email_export(user, export)
+            sent_as = 'a download link' if download_url else export.filename
+            print(f"[INFO] Successfully sent {export.row_count} quiz attempts as {sent_as} to {user.email}")
+            return f"Exported quiz attempts for user {user.email} to CSV"
 
         except Exception as e:
             print(f"[ERROR] Failed to export CSV for user {user_id}: {str(e)}")
-        return f"Exported quiz attempts for user {user.email} to CSV"
+            return f"Error: {str(e)}"
+
+@celery_app.task
+def export_all_attempts_csv(admin_id):
+    """
+    Streams every user's quiz attempts into one CSV (gzipped when large)
+    and emails it to the admin who asked for it. Memory stays flat
+    while the file is built.
+    """
+    with flask_app.app_context():
+        try:
+            admin = db.session.get(User, admin_id)
+            if not admin:
+                print(f"[ERROR] User with ID {admin_id} not found for CSV export.")
+                return
+
+            export = write_attempts_csv()
+            download_url = _email_export(admin, export, all_users=True)
+            sent_as = 'a download link' if download_url else export.filename
+            print(f"[INFO] Successfully sent {export.row_count} quiz attempts as {sent_as} to {admin.email}")
+            return f"Exported {export.row_count} quiz attempts to {admin.email}"
+
+        except Exception as e:
+            print(f"[ERROR] Failed to export all quiz attempts: {str(e)}")
+            return f"Error: {str(e)}"
+
+@celery_app.task
+def drain_submission_queue():
+    """
+    Write queued write-behind submissions to SQL, SUBMISSION_BATCH_SIZE per
+    INSERT and commit, until the queue is empty. Runs from beat every few
+    seconds; a second run while one is draining returns straight away.
+    Stops at the first batch the database can't take, leaving it queued.
+    """
+    if not flask_app.config['SUBMISSION_WRITE_BEHIND']:
+        return "Write-behind submissions are off"
+    try:
+        batch_size = flask_app.config['SUBMISSION_BATCH_SIZE']
+        drained = 0
+        while True:
+            try:
+                count = drain_submissions(batch_size)
+            except SubmissionStoreUnavailable as e:
+                print(f"[ERROR] Database unavailable after {drained} queued quiz submissions, retrying next run: {str(e)}")
+                return f"Stored {drained} queued quiz submissions, stopped: {str(e)}"
+            drained += count
+            if count < batch_size:
+                break
+
+        if drained:
+            print(f"[INFO] Stored {drained} queued quiz submissions")
+        return f"Stored {drained} queued quiz submissions"
+
+    except Exception as e:
+        print(f"[ERROR] Error draining the submission queue: {str(e)}")
+        return f"Error: {str(e)}"
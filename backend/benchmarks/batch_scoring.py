@@ -0,0 +1,137 @@
+"""
+Compare the single-submission scoring path (POST /api/quiz-attempts, one
+request and one commit per answer sheet) with the batch path
+(POST /api/quiz-attempts/batch, vectorized scoring and one executemany INSERT).
+Both run the same scoring, insert and subject-aggregate work as the
+endpoints, against a throwaway SQLite file, without the HTTP layer.
+
+    $ cd backend
+    $ python -m benchmarks.batch_scoring --sheets 500 --questions 40
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+from flask import Flask
+from sqlalchemy import insert
+
+from application import cache
+from application.data.answer_keys import get_answer_key, score_answer_sheets, score_answers
+from application.data.database import db
+from application.data.models import Chapter, Question, Quiz, QuizAttempt, Role, Subject, User
+from application.data.subject_stats import record_attempt, record_attempts
+
+
+def create_benchmark_app(database_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f'sqlite:///{database_path}',
+        CACHE_TYPE='NullCache',
+    )
+    db.init_app(app)
+    cache.init_app(app)
+    return app
+
+
+def seed(user_count, question_count):
+    role = Role(name='user')
+    users = [
+        User(email=f'student{i}@example.com', password='x', full_name=f'Student {i}', fs_uniquifier=f'batch{i}', roles=[role])
+        for i in range(user_count)
+    ]
+    subject = Subject(name='Mathematics')
+    chapter = Chapter(name='Algebra', subject=subject)
+    quiz = Quiz(title='Linear equations', chapter=chapter, date_of_quiz=datetime.now(), time_duration=10)
+    questions = [
+        Question(quiz=quiz, question_statement=f'Question {i}', option1='a', option2='b', option3='c', option4='d',
+                 correct_option=random.randint(1, 4))
+        for i in range(question_count)
+    ]
+    db.session.add_all([role, subject, chapter, quiz, *users, *questions])
+    db.session.commit()
+    return quiz.id, [user.id for user in users]
+
+
+def make_sheets(answer_key, user_ids, count):
+    return [
+        (random.choice(user_ids), {str(question_id): random.randint(1, 4) for question_id in answer_key.question_ids})
+        for _ in range(count)
+    ]
+
+
+def run_single(quiz_id, sheets):
+    for user_id, answers in sheets:
+        answer_key = get_answer_key(quiz_id)
+        total_score = score_answers(answer_key, answers)
+        max_score = len(answer_key.question_ids)
+        attempt = QuizAttempt(
+            user_id=user_id,
+            quiz_id=quiz_id,
+            total_score=total_score,
+            max_score=max_score,
+            percentage=round(total_score / max_score * 100, 2),
+            timestamp=datetime.now()
+        )
+        db.session.add(attempt)
+        record_attempt(answer_key.subject_id, attempt.percentage)
+        db.session.commit()
+
+
+def run_batch(quiz_id, sheets):
+    answer_key = get_answer_key(quiz_id)
+    scores = score_answer_sheets(answer_key, [answers for _, answers in sheets])
+    max_score = len(answer_key.question_ids)
+    percentages = (scores / max_score * 100).round(2)
+    timestamp = datetime.now()
+    db.session.scalars(
+        insert(QuizAttempt).returning(QuizAttempt.id, sort_by_parameter_order=True),
+        [{
+            'user_id': user_id,
+            'quiz_id': quiz_id,
+            'total_score': int(score),
+            'max_score': max_score,
+            'percentage': float(percentage),
+            'timestamp': timestamp
+        } for (user_id, _), score, percentage in zip(sheets, scores, percentages)]
+    ).all()
+    record_attempts(answer_key.subject_id, percentages)
+    db.session.commit()
+
+
+def timed(run, quiz_id, sheets):
+    start = perf_counter()
+    run(quiz_id, sheets)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sheets', type=int, default=500, help='answer sheets per run')
+    parser.add_argument('--questions', type=int, default=40, help='questions in the quiz')
+    parser.add_argument('--users', type=int, default=50, help='distinct users submitting')
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app(os.path.join(tmp, 'batch_scoring.db'))
+        with app.app_context():
+            db.create_all()
+            quiz_id, user_ids = seed(args.users, args.questions)
+            sheets = make_sheets(get_answer_key(quiz_id), user_ids, args.sheets)
+
+            single = timed(run_single, quiz_id, sheets)
+            batch = timed(run_batch, quiz_id, sheets)
+            db.session.remove()
+            db.engine.dispose()
+
+    print(f"{args.sheets} sheets x {args.questions} questions")
+    print(f"  single: {single:8.3f}s  {args.sheets / single:10.1f} sheets/s")
+    print(f"  batch:  {batch:8.3f}s  {args.sheets / batch:10.1f} sheets/s")
+    print(f"  speedup: {single / batch:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
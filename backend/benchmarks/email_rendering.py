@@ -0,0 +1,63 @@
+"""
+Time rendering personalized emails from the compiled Jinja2 templates:
+reminders with the quiz block re-rendered for every user versus rendered once
+per batch, and monthly reports. No database or SMTP server is needed.
+
+    $ cd backend
+    $ python -m benchmarks.email_rendering --emails 10000
+"""
+import argparse
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from application.emails import render_performance_report, render_reminder, render_reminder_quiz_list
+
+ReminderQuiz = namedtuple('ReminderQuiz', ['title', 'subject_name', 'chapter_name', 'date_of_quiz', 'time_duration'])
+
+
+def timed(label, count, run):
+    start = perf_counter()
+    size = run()
+    elapsed = perf_counter() - start
+    print(f"{label:<32} {elapsed:8.3f}s  {count / elapsed:10.0f} emails/s  {size / count:8.0f} bytes/email")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--emails', type=int, default=10000)
+    parser.add_argument('--quizzes', type=int, default=10, help='upcoming quizzes per reminder')
+    parser.add_argument('--subjects', type=int, default=8, help='subjects per report')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = datetime.now()
+    quizzes = [
+        ReminderQuiz(f'Quiz {i}', f'Subject {i % 4}', f'Chapter {i}', now + timedelta(hours=i), 30)
+        for i in range(args.quizzes)
+    ]
+    names = [f'Student {i}' for i in range(args.emails)]
+    reports = [
+        [(f'Subject {j}', rng.randint(1, 5), rng.randint(0, 50), 50) for j in range(rng.randint(0, args.subjects))]
+        for _ in range(args.emails)
+    ]
+
+    # Compile the templates outside the timed runs
+    render_reminder('warmup', render_reminder_quiz_list(quizzes))
+    render_performance_report('warmup', reports[0])
+
+    timed('reminders, block per user', args.emails,
+          lambda: sum(len(render_reminder(name, render_reminder_quiz_list(quizzes))) for name in names))
+
+    def shared_block():
+        quiz_list = render_reminder_quiz_list(quizzes)
+        return sum(len(render_reminder(name, quiz_list)) for name in names)
+
+    timed('reminders, block once per batch', args.emails, shared_block)
+    timed('monthly reports', args.emails,
+          lambda: sum(len(render_performance_report(name, subjects)) for name, subjects in zip(names, reports)))
+
+
+if __name__ == '__main__':
+    main()
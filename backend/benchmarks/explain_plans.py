@@ -0,0 +1,134 @@
+"""
+Print SQLite's EXPLAIN QUERY PLAN for the data_access queries and the hot
+resource queries, once without the secondary indexes and once with them, so
+index searches can be checked against full table scans.
+
+    $ cd backend
+    $ python -m benchmarks.explain_plans
+"""
+from datetime import datetime, time, timedelta
+
+from flask import Flask
+from sqlalchemy import event
+
+from application import cache
+from application.data import aggregates, data_access
+from application.data.database import db
+from application.data.models import Chapter, Question, Quiz, QuizAttempt, Role, Subject, User
+
+
+def create_explain_app():
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        CACHE_TYPE='NullCache',
+    )
+    db.init_app(app)
+    cache.init_app(app)
+    return app
+
+
+def seed():
+    """One row per table is enough for the planner to pick its strategy."""
+    role = Role(name='user')
+    user = User(email='student@example.com', password='x', full_name='Student', fs_uniquifier='explain', roles=[role])
+    subject = Subject(name='Mathematics')
+    chapter = Chapter(name='Algebra', subject=subject)
+    quiz = Quiz(title='Linear equations', chapter=chapter, date_of_quiz=datetime.now(), time_duration=10)
+    question = Question(quiz=quiz, question_statement='1 + 1', option1='1', option2='2', option3='3', option4='4', correct_option=2)
+    attempt = QuizAttempt(user=user, quiz=quiz, total_score=1, max_score=1, percentage=100)
+    db.session.add_all([role, user, subject, chapter, quiz, question, attempt])
+    db.session.commit()
+    return user.id, subject.id, quiz.id, attempt.id
+
+
+def hot_queries(user_id, subject_id, quiz_id, attempt_id):
+    """(label, callable) for every query worth checking."""
+    since = datetime.now() - timedelta(days=30)
+    window_start = datetime.combine(datetime.now().date(), time.min)
+    return [
+        ('data_access.get_quiz_attempt_by_id', lambda: data_access.get_quiz_attempt_by_id(attempt_id)),
+        ('data_access.get_all_quiz_attempts', data_access.get_all_quiz_attempts),
+        ('data_access.get_quiz_attempts_by_user', lambda: data_access.get_quiz_attempts_by_user(user_id)),
+        ('data_access.get_quiz_attempts_by_user_ordered_by_timestamp_desc',
+         lambda: data_access.get_quiz_attempts_by_user_ordered_by_timestamp_desc(user_id)),
+        ('UserListResource.get page', lambda: data_access.student_users_query().limit(20).all()),
+        ('UserListResource.get search', lambda: data_access.student_users_query('stud', sort='full_name').limit(20).all()),
+        ('aggregates.get_subject_stats', aggregates.get_subject_stats),
+        ('aggregates.get_user_totals', lambda: aggregates.get_user_totals(user_id, since=since)),
+        ('aggregates.get_user_subject_totals', lambda: aggregates.get_user_subject_totals(user_id, since=since)),
+        ('UserQuizAttemptsResource.get page', lambda: QuizAttempt.query.filter_by(user_id=user_id)
+            .order_by(QuizAttempt.timestamp.desc()).limit(10).all()),
+        ('QuizAttemptsResource.get page (admin)', lambda: QuizAttempt.query
+            .order_by(QuizAttempt.timestamp.desc()).limit(10).all()),
+        ('QuizAttemptsResource.get page (quiz filter)', lambda: QuizAttempt.query.filter_by(quiz_id=quiz_id)
+            .order_by(QuizAttempt.timestamp.desc()).limit(10).all()),
+        ('QuestionResource.get', lambda: Question.query.filter_by(quiz_id=quiz_id).all()),
+        ('ChapterResource.post duplicate check', lambda: Chapter.query.filter_by(name='Algebra', subject_id=subject_id).first()),
+        ('send_daily_quiz_reminders', lambda: Quiz.query.filter(
+            Quiz.is_active == True,
+            Quiz.date_of_quiz >= window_start,
+            Quiz.date_of_quiz < window_start + timedelta(days=2)
+        ).all()),
+    ]
+
+
+def capture_statements(queries):
+    """Run each query once and record the SELECT statements it emits."""
+    captured = []
+    seen = set()
+    current = {'label': None}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and statement not in seen:
+            seen.add(statement)
+            captured.append((current['label'], statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        for label, run in queries:
+            current['label'] = label
+            db.session.expunge_all()
+            run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return captured
+
+
+def explain(statements):
+    plans = []
+    with db.engine.connect() as conn:
+        for _, statement, parameters in statements:
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            plans.append([row[-1] for row in rows])
+    return plans
+
+
+def main():
+    app = create_explain_app()
+    with app.app_context(), app.test_request_context():
+        db.create_all()
+        statements = capture_statements(hot_queries(*seed()))
+
+        indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+        for index in indexes:
+            index.drop(db.engine)
+        before = explain(statements)
+        for index in indexes:
+            index.create(db.engine)
+        after = explain(statements)
+
+    for (label, statement, _), plan_before, plan_after in zip(statements, before, after):
+        print(f"== {label}")
+        print(' '.join(statement.split()))
+        print("  before:")
+        for line in plan_before:
+            print(f"    {line}")
+        print("  after:")
+        for line in plan_after:
+            print(f"    {line}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
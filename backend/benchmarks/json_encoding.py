@@ -0,0 +1,92 @@
+"""
+Time encoding API response bodies with orjson versus the stdlib json module,
+through the same application.representations.dumps the API uses: the user
+listing, a page of attempts with datetimes, and the marshalled quiz catalog.
+No database is needed.
+
+    $ cd backend
+    $ python -m benchmarks.json_encoding --users 100000
+"""
+import argparse
+import random
+import sys
+from datetime import date, datetime, timedelta
+from time import perf_counter
+
+from flask import Flask
+
+from application import representations
+
+
+def payloads(args, rng):
+    now = datetime.now()
+    users = [{
+        'id': i,
+        'email': f'student{i}@example.com',
+        'full_name': f'Student {i}',
+        'qualification': 'B.Tech',
+        'dob': date(2000, 1, 1) + timedelta(days=rng.randint(0, 3650)),
+        'active': rng.random() > 0.1,
+        'roles': ['user']
+    } for i in range(args.users)]
+    attempts = {'attempts': [{
+        'id': i,
+        'user_id': rng.randint(1, args.users),
+        'quiz_id': rng.randint(1, 500),
+        'timestamp': now - timedelta(seconds=rng.randint(0, 10 ** 7)),
+        'total_score': float(rng.randint(0, 20)),
+        'max_score': 20.0,
+        'percentage': round(rng.random() * 100, 2),
+        'user_name': f'student{i}@example.com',
+        'quiz_title': f'Quiz {i % 500}'
+    } for i in range(args.attempts)]}
+    quizzes = [{
+        'id': i,
+        'title': f'Quiz {i}',
+        'chapter': f'Chapter {i % 50}',
+        'subject': f'Subject {i % 10}',
+        'date_of_quiz': str(now + timedelta(hours=i)),
+        'time_duration': 30,
+        'remarks': None,
+        'is_active': True,
+        'questions': [{
+            'id': i * args.questions + j,
+            'quiz_id': i,
+            'question_statement': f'Question {j} of quiz {i}?',
+            'option1': 'First', 'option2': 'Second', 'option3': 'Third', 'option4': 'Fourth',
+            'correct_option': rng.randint(1, 4)
+        } for j in range(args.questions)]
+    } for i in range(args.quizzes)]
+    return [('users', users), ('attempts', attempts), ('quiz catalog', quizzes)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--attempts', type=int, default=100000)
+    parser.add_argument('--quizzes', type=int, default=500)
+    parser.add_argument('--questions', type=int, default=20, help='questions per quiz')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if representations.orjson is None:
+        sys.exit("orjson is not installed: pip install orjson")
+
+    app = Flask(__name__)
+    rng = random.Random(0)
+    with app.app_context():
+        for name, data in payloads(args, rng):
+            timings = {}
+            for encoder in ('json', 'orjson'):
+                app.config['API_JSON_ENCODER'] = encoder
+                body = representations.dumps(data)
+                start = perf_counter()
+                for _ in range(args.repeat):
+                    representations.dumps(data)
+                timings[encoder] = (perf_counter() - start) / args.repeat
+            print(f"{name:<14} {len(body) / 1e6:7.1f} MB  json {timings['json'] * 1000:8.1f} ms  "
+                  f"orjson {timings['orjson'] * 1000:8.1f} ms  {timings['json'] / timings['orjson']:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Drive the API endpoints through the Flask test client against a seeded
+SQLite database and report p50/p95/p99 latency, SQL queries per request and
+the process's peak RSS as JSON.
+
+    $ cd backend
+    $ python -m benchmarks.load_test --users 500 --attempts 50000 --requests 200 --output report.json
+
+--max-queries N exits non-zero when any endpoint averages more than N
+queries per request, so the run can gate a CI job.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from time import perf_counter
+
+from sqlalchemy import event
+
+from benchmarks.seed import DatasetSize, seed_dataset
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def scenarios(dataset, rng):
+    """(name, method, role, url(), body()) for every endpoint worth timing."""
+    def any_of(ids):
+        return lambda: rng.choice(ids)
+
+    user = any_of(dataset.user_ids)
+    subject = any_of(dataset.subject_ids)
+    quiz = any_of(dataset.quiz_ids)
+    attempt = any_of(dataset.attempt_ids)
+    none = lambda: None
+
+    return [
+        ('GET /api/subjects', 'get', 'admin', lambda: '/api/subjects', none),
+        ('GET /api/subjects/<id>', 'get', 'admin', lambda: f'/api/subjects/{subject()}', none),
+        ('GET /api/quizzes', 'get', 'user', lambda: '/api/quizzes', none),
+        ('GET /api/quizzes/catalog', 'get', 'user', lambda: '/api/quizzes/catalog', none),
+        ('GET /api/quizzes/<id>', 'get', 'user', lambda: f'/api/quizzes/{quiz()}', none),
+        ('GET /api/quizzes/<id>/questions', 'get', 'admin', lambda: f'/api/quizzes/{quiz()}/questions', none),
+        ('GET /api/users', 'get', 'admin', lambda: '/api/users?per_page=20', none),
+        ('GET /api/users?q', 'get', 'admin', lambda: '/api/users?q=stud&sort=full_name', none),
+        ('GET /api/quiz-attempts', 'get', 'admin', lambda: '/api/quiz-attempts?per_page=20', none),
+        ('GET /api/quiz-attempts?quiz_id', 'get', 'admin', lambda: f'/api/quiz-attempts?quiz_id={quiz()}', none),
+        ('GET /api/quiz-attempts/<id>', 'get', 'user', lambda: f'/api/quiz-attempts/{attempt()}', none),
+        ('GET /api/users/<id>/quiz-attempts', 'get', 'user', lambda: f'/api/users/{user()}/quiz-attempts', none),
+        ('GET /api/users/<id>/stats', 'get', 'admin', lambda: f'/api/users/{user()}/stats', none),
+        ('GET /api/quiz-attempts/stats', 'get', 'admin', lambda: '/api/quiz-attempts/stats', none),
+        ('POST /api/quiz-attempts', 'post', 'user', lambda: '/api/quiz-attempts',
+         lambda: {'quiz_id': quiz(), 'answers': {}}),
+    ]
+
+
+def run(app, client, scenario_list, headers, requests, warmup, query_counter):
+    results = {}
+    for name, method, role, url, body in scenario_list:
+        latencies = []
+        queries = 0
+        statuses = {}
+        for i in range(warmup + requests):
+            kwargs = {'headers': headers[role]}
+            payload = body()
+            if payload is not None:
+                kwargs['json'] = payload
+            path = url()
+
+            # A fresh app context per request, so g (and current_user) never leaks between requests
+            with app.app_context():
+                query_counter['n'] = 0
+                start = perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                elapsed = perf_counter() - start
+            if i < warmup:
+                continue
+            latencies.append(elapsed * 1000)
+            queries += query_counter['n']
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        latencies.sort()
+        results[name] = {
+            'requests': requests,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'queries_per_request': round(queries / requests, 2),
+            'status_codes': statuses
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--subjects', type=int, default=10)
+    parser.add_argument('--chapters', type=int, default=5, help='chapters per subject')
+    parser.add_argument('--quizzes', type=int, default=4, help='quizzes per chapter')
+    parser.add_argument('--questions', type=int, default=20, help='questions per quiz')
+    parser.add_argument('--attempts', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per endpoint')
+    parser.add_argument('--cache-type', default='SimpleCache', help='Flask-Caching backend, e.g. NullCache for cold reads')
+    parser.add_argument('--database', help='SQLite file to drop, recreate and seed (default: a temporary file)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--max-queries', type=float, help='fail if an endpoint averages more queries per request')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.requests < 1:
+        parser.error('--requests must be at least 1')
+
+    size = DatasetSize(args.users, args.subjects, args.chapters, args.quizzes, args.questions, args.attempts)
+    tmp = None
+    database = args.database
+    if not database:
+        tmp = tempfile.TemporaryDirectory()
+        database = os.path.join(tmp.name, 'benchmark.db')
+
+    # The app reads these when app.py is imported
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.abspath(database)}'
+    os.environ['CACHE_TYPE'] = args.cache_type
+
+    try:
+        # Keep stdout for the report; the app's own prints go to stderr
+        with redirect_stdout(sys.stderr):
+            from app import api
+            from application.data.database import db
+
+            app = api.app
+            with app.app_context():
+                db.drop_all()
+                db.create_all()
+                seed_started = perf_counter()
+                dataset = seed_dataset(size, seed=args.seed)
+                seed_seconds = perf_counter() - seed_started
+
+                datastore = app.security.datastore
+                headers = {
+                    'admin': {'Authentication-Token': datastore.find_user(id=dataset.admin_id).get_auth_token()},
+                    'user': {'Authentication-Token': datastore.find_user(id=dataset.user_ids[0]).get_auth_token()},
+                }
+
+                query_counter = {'n': 0}
+
+                def count_query(conn, cursor, statement, parameters, context, executemany):
+                    query_counter['n'] += 1
+
+                event.listen(db.engine, 'before_cursor_execute', count_query)
+
+            rng = random.Random(args.seed)
+            endpoints = run(app, app.test_client(), scenarios(dataset, rng), headers,
+                            args.requests, args.warmup, query_counter)
+    finally:
+        if tmp:
+            tmp.cleanup()
+
+    report = {
+        'dataset': size._asdict(),
+        'seed_seconds': round(seed_seconds, 2),
+        'cache_type': args.cache_type,
+        'endpoints': endpoints,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.max_queries is not None:
+        over = {name: result['queries_per_request'] for name, result in endpoints.items()
+                if result['queries_per_request'] > args.max_queries}
+        if over:
+            print(f"[ERROR] Endpoints over {args.max_queries} queries per request: {over}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
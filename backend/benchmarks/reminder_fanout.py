@@ -0,0 +1,130 @@
+"""
+Compare the old per-user reminder fan-out (one send_quiz_reminder_email task
+and two queries per user) with the batched send_daily_quiz_reminders fan-out.
+Both send through the worker's pooled SMTP connection. Tasks run eagerly in-process against a
+seeded SQLite file and a local aiosmtpd server that just counts messages.
+
+    $ pip install aiosmtpd
+    $ cd backend
+    $ python -m benchmarks.reminder_fanout --users 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from flask_mail import Mail
+from sqlalchemy import event, select, update
+
+from benchmarks.seed import DatasetSize, seed_dataset
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    sys.exit("This benchmark needs a local SMTP server: pip install aiosmtpd")
+
+
+class CountingHandler:
+    """aiosmtpd handler that accepts everything and counts connections and messages."""
+
+    def __init__(self):
+        self.connections = 0
+        self.messages = 0
+
+    def reset(self):
+        self.connections = 0
+        self.messages = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # Once per connection, since nothing here upgrades to TLS
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += len(envelope.rcpt_tos)
+        return '250 OK'
+
+
+def measure(label, run, handler, query_counter):
+    handler.reset()
+    query_counter['n'] = 0
+    start = perf_counter()
+    with redirect_stdout(open(os.devnull, 'w')):
+        run()
+    elapsed = perf_counter() - start
+    print(f"{label:<10} {elapsed:8.2f}s  {handler.messages:7d} emails  "
+          f"{handler.connections:7d} SMTP connections  {query_counter['n']:7d} queries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--smtp-port', type=int, default=8025)
+    args = parser.parse_args()
+
+    handler = CountingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=args.smtp_port)
+    controller.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'reminders.db')}"
+        os.environ['CACHE_TYPE'] = 'NullCache'
+
+        from celery_config import celery_app, flask_app
+        from application import tasks
+        from application.data.database import db
+        from application.data.models import Quiz
+
+        celery_app.conf.task_always_eager = True
+        flask_app.config.update(
+            MAIL_SERVER='127.0.0.1',
+            MAIL_PORT=args.smtp_port,
+            MAIL_USE_TLS=False,
+            MAIL_USE_SSL=False,
+            MAIL_USERNAME=None,
+            MAIL_PASSWORD=None,
+            MAIL_DEFAULT_SENDER='reminders@benchmark.local',
+            MAIL_DEBUG=False,
+            EMAIL_BATCH_SIZE=args.batch_size,
+        )
+        # Re-read the mail settings (default sender) changed above
+        Mail(flask_app)
+
+        with flask_app.app_context():
+            db.create_all()
+            dataset = seed_dataset(DatasetSize(args.users, 5, 4, 5, 1, 0), password='x')
+            # Put the first five quizzes in the reminder window (today and tomorrow)
+            quiz_ids = db.session.scalars(select(Quiz.id).order_by(Quiz.id).limit(5)).all()
+            db.session.execute(
+                update(Quiz).where(Quiz.id.in_(quiz_ids)).values(date_of_quiz=datetime.now() + timedelta(hours=1))
+            )
+            db.session.execute(
+                update(Quiz).where(Quiz.id.not_in(quiz_ids)).values(date_of_quiz=datetime.now() + timedelta(days=7))
+            )
+            db.session.commit()
+
+            query_counter = {'n': 0}
+
+            def count_query(conn, cursor, statement, parameters, context, executemany):
+                query_counter['n'] += 1
+
+            event.listen(db.engine, 'before_cursor_execute', count_query)
+
+            user_ids = [dataset.admin_id] + dataset.user_ids
+            measure('per-user', lambda: [tasks.send_quiz_reminder_email(user_id, quiz_ids) for user_id in user_ids],
+                    handler, query_counter)
+            measure('batched', tasks.send_daily_quiz_reminders, handler, query_counter)
+
+            db.session.remove()
+            db.engine.dispose()
+
+    controller.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Synthetic dataset for the benchmarks. Rows go in with Core executemany
+inserts, so a dataset of a few hundred thousand attempts seeds in seconds.
+"""
+import random
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask_security.utils import hash_password
+from sqlalchemy import insert, select
+
+from application.data.models import Chapter, Question, Quiz, QuizAttempt, Role, Subject, User, db, roles_users
+from application.data.subject_stats import rebuild_subject_stats
+
+DatasetSize = namedtuple('DatasetSize', ['users', 'subjects', 'chapters', 'quizzes', 'questions', 'attempts'])
+DatasetSize.__doc__ = 'Users and attempts are totals; chapters, quizzes and questions are per parent.'
+
+# (admin id, user ids, subject ids, quiz ids, attempt ids)
+Dataset = namedtuple('Dataset', ['admin_id', 'user_ids', 'subject_ids', 'quiz_ids', 'attempt_ids'])
+
+CHUNK_SIZE = 5000
+
+
+def _insert_chunked(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+
+def _ids(model):
+    return list(db.session.scalars(select(model.id).order_by(model.id)))
+
+
+def seed_dataset(size, seed=0, password=None):
+    """
+    Seed an empty database with size rows. Every account's password is
+    'benchmark' unless a ready-made password hash is passed (apps without
+    Flask-Security, like the Celery worker's, can't hash one).
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    password = password or hash_password('benchmark')
+
+    admin_role = Role(name='admin', description='Superuser of app')
+    user_role = Role(name='user', description='General user of app')
+    db.session.add_all([admin_role, user_role])
+    db.session.flush()
+
+    _insert_chunked(User, [{
+        'email': 'admin@benchmark.local',
+        'password': password,
+        'full_name': 'Benchmark Admin',
+        'active': True,
+        'fs_uniquifier': uuid.uuid4().hex
+    }] + [{
+        'email': f'student{i}@benchmark.local',
+        'password': password,
+        'full_name': f'Student {i}',
+        'qualification': rng.choice(['B.Sc', 'B.Tech', 'M.Sc', None]),
+        'active': True,
+        'fs_uniquifier': uuid.uuid4().hex
+    } for i in range(size.users)])
+    admin_id, *user_ids = _ids(User)
+    db.session.execute(insert(roles_users), [{'user_id': admin_id, 'role_id': admin_role.id}] + [
+        {'user_id': user_id, 'role_id': user_role.id} for user_id in user_ids
+    ])
+
+    _insert_chunked(Subject, [{'name': f'Subject {i}', 'created_at': now} for i in range(size.subjects)])
+    subject_ids = _ids(Subject)
+    _insert_chunked(Chapter, [
+        {'subject_id': subject_id, 'name': f'Chapter {i}', 'created_at': now}
+        for subject_id in subject_ids for i in range(size.chapters)
+    ])
+    _insert_chunked(Quiz, [{
+        'chapter_id': chapter_id,
+        'title': f'Quiz {i}',
+        'date_of_quiz': now + timedelta(days=rng.randint(-30, 30)),
+        'time_duration': 30,
+        'is_active': True
+    } for chapter_id in _ids(Chapter) for i in range(size.quizzes)])
+    quiz_ids = _ids(Quiz)
+    _insert_chunked(Question, [{
+        'quiz_id': quiz_id,
+        'question_statement': f'Question {i}',
+        'option1': 'A', 'option2': 'B', 'option3': 'C', 'option4': 'D',
+        'correct_option': rng.randint(1, 4)
+    } for quiz_id in quiz_ids for i in range(size.questions)])
+
+    attempts = []
+    for _ in range(size.attempts):
+        total_score = rng.randint(0, size.questions)
+        attempts.append({
+            'user_id': rng.choice(user_ids),
+            'quiz_id': rng.choice(quiz_ids),
+            'timestamp': now - timedelta(seconds=rng.randint(0, 180 * 24 * 60 * 60)),
+            'total_score': total_score,
+            'max_score': size.questions,
+            'percentage': round(total_score / size.questions * 100, 2) if size.questions else 0
+        })
+    _insert_chunked(QuizAttempt, attempts)
+    db.session.commit()
+
+    rebuild_subject_stats()
+    db.session.commit()
+    return Dataset(admin_id, user_ids, subject_ids, quiz_ids, _ids(QuizAttempt))
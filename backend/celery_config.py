@@ -1,5 +1,6 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from flask import Flask
 from flask_mail import Mail
 from dotenv import load_dotenv
@@ -13,23 +14,32 @@ def create_celery_app():
     app = Flask(__name__)
 
     # Load configuration
-    from application.config import LocalDevConfig
-    app.config.from_object(LocalDevConfig)
+    from application.config import get_config
+    config = get_config()
+    app.config.from_object(config)
 
     # Initialize database with app
-    from application.data.database import db
+    from application.data.database import db, init_sqlite_pragmas
     db.init_app(app)
+    with app.app_context():
+        init_sqlite_pragmas(app)
 
     # Initialize mail with app
     mail = Mail(app)
 
+    # Workers write too, so they evict cached reads the same way the API does
+    from application import cache
+    from application.data.cache_events import init_cache_events
+    cache.init_app(app)
+    init_cache_events()
+
     # Create Celery instance
     celery = Celery('quiz_master')
 
     # Configure Celery
     celery.conf.update(
-        broker_url='redis://localhost:6379/1',
-        result_backend='redis://localhost:6379/2',
+        broker_url=config.broker_url,
+        result_backend=config.result_backend,
         timezone='UTC',
         task_serializer='json',
         accept_content=['json'],
@@ -49,6 +59,11 @@ def create_celery_app():
         beat_scheduler='celery.beat:PersistentScheduler',
         beat_schedule_filename='beat-schedule.db',
     )
+    if config.SUBMISSION_WRITE_BEHIND:
+        celery.conf.beat_schedule['drain-submission-queue'] = {
+            'task': 'application.tasks.drain_submission_queue',
+            'schedule': 5.0,  # Every 5 seconds
+        }
 
     # Context task that properly initializes Flask app context
     class ContextTask(celery.Task):
@@ -62,5 +77,16 @@ def create_celery_app():
 # Create instances
 celery_app, flask_app = create_celery_app()
 
+@worker_process_init.connect
+def init_worker_smtp_pool(**kwargs):
+    # After the fork, so no SMTP socket is shared between worker processes
+    from application.mailer import init_smtp_pool
+    init_smtp_pool(flask_app)
+
+@worker_process_shutdown.connect
+def close_worker_smtp_pool(**kwargs):
+    from application.mailer import close_smtp_pool
+    close_smtp_pool()
+
 # Import tasks after celery_app is created
 from application import tasks
@@ -0,0 +1,40 @@
+"""Hot path indexes
+
+Revision ID: d52e8b0c4a17
+Revises: a3c91f5d7b20
+Create Date: 2026-10-18 15:42:07.582913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52e8b0c4a17'
+down_revision = 'a3c91f5d7b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_roles_users_user_id', 'roles_users', ['user_id'], unique=False)
+    op.create_index('ix_roles_users_role_id_user_id', 'roles_users', ['role_id', 'user_id'], unique=False)
+    op.create_index('ix_chapters_subject_id_name', 'chapters', ['subject_id', 'name'], unique=False)
+    op.create_index('ix_quizzes_chapter_id', 'quizzes', ['chapter_id'], unique=False)
+    op.create_index('ix_quizzes_is_active_date_of_quiz', 'quizzes', ['is_active', 'date_of_quiz'], unique=False)
+    op.create_index('ix_questions_quiz_id', 'questions', ['quiz_id'], unique=False)
+    op.create_index('ix_quiz_attempts_user_id_timestamp', 'quiz_attempts', ['user_id', sa.text('timestamp DESC')], unique=False)
+    op.create_index('ix_quiz_attempts_quiz_id_timestamp', 'quiz_attempts', ['quiz_id', sa.text('timestamp DESC')], unique=False)
+    op.create_index('ix_quiz_attempts_timestamp', 'quiz_attempts', ['timestamp'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_quiz_attempts_timestamp', table_name='quiz_attempts')
+    op.drop_index('ix_quiz_attempts_quiz_id_timestamp', table_name='quiz_attempts')
+    op.drop_index('ix_quiz_attempts_user_id_timestamp', table_name='quiz_attempts')
+    op.drop_index('ix_questions_quiz_id', table_name='questions')
+    op.drop_index('ix_quizzes_is_active_date_of_quiz', table_name='quizzes')
+    op.drop_index('ix_quizzes_chapter_id', table_name='quizzes')
+    op.drop_index('ix_chapters_subject_id_name', table_name='chapters')
+    op.drop_index('ix_roles_users_role_id_user_id', table_name='roles_users')
+    op.drop_index('ix_roles_users_user_id', table_name='roles_users')
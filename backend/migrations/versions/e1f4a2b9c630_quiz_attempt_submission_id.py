@@ -0,0 +1,28 @@
+"""Quiz attempt submission id
+
+Revision ID: e1f4a2b9c630
+Revises: d52e8b0c4a17
+Create Date: 2026-10-18 17:05:21.413870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f4a2b9c630'
+down_revision = 'd52e8b0c4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('submission_id', sa.String(length=32), nullable=True))
+        batch_op.create_unique_constraint('uq_quiz_attempts_submission_id', ['submission_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('quiz_attempts', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_quiz_attempts_submission_id', type_='unique')
+        batch_op.drop_column('submission_id')
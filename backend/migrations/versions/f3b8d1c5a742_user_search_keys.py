@@ -0,0 +1,59 @@
+"""User search keys
+
+Revision ID: f3b8d1c5a742
+Revises: e1f4a2b9c630
+Create Date: 2026-10-18 21:06:44.318204
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1c5a742'
+down_revision = 'e1f4a2b9c630'
+branch_labels = None
+depends_on = None
+
+search_key_type = sa.Text().with_variant(postgresql.TEXT(collation='C'), 'postgresql')
+
+
+def search_key(value):
+    # Same folding as application.data.models.search_key, frozen here
+    return unicodedata.normalize('NFKC', value).casefold() if value is not None else None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('email_search', search_key_type, nullable=True))
+        batch_op.add_column(sa.Column('full_name_search', search_key_type, nullable=True))
+
+    users = sa.table('users', sa.column('id'), sa.column('email'), sa.column('full_name'),
+                     sa.column('email_search'), sa.column('full_name_search'))
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(users.c.id, users.c.email, users.c.full_name)).all()
+    if rows:
+        conn.execute(
+            users.update().where(users.c.id == sa.bindparam('user_id')).values(
+                email_search=sa.bindparam('email_key'), full_name_search=sa.bindparam('full_name_key')
+            ),
+            [{'user_id': row.id, 'email_key': search_key(row.email), 'full_name_key': search_key(row.full_name)}
+             for row in rows]
+        )
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('email_search', existing_type=search_key_type, nullable=False)
+        batch_op.alter_column('full_name_search', existing_type=search_key_type, nullable=False)
+        batch_op.create_index('ix_users_email_search', ['email_search'], unique=False)
+        batch_op.create_index('ix_users_full_name_search', ['full_name_search'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_full_name_search')
+        batch_op.drop_index('ix_users_email_search')
+        batch_op.drop_column('full_name_search')
+        batch_op.drop_column('email_search')
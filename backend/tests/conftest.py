@@ -0,0 +1,85 @@
+import os
+
+import fakeredis
+import pytest
+from flask import has_app_context
+from flask.globals import app_ctx
+from sqlalchemy import event
+
+# app.py builds the app when it is imported, from these. NullCache keeps
+# every read going to SQL, so statement counts are those of a cold cache.
+os.environ['APP_ENV'] = 'development'
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['CACHE_TYPE'] = 'NullCache'
+os.environ['SUBMISSION_WRITE_BEHIND'] = 'false'
+
+import app as app_module  # noqa: E402,F401
+from application.data.database import db  # noqa: E402
+from benchmarks.seed import DatasetSize, seed_dataset  # noqa: E402
+
+TEST_DATASET = DatasetSize(users=20, subjects=3, chapters=2, quizzes=3, questions=5, attempts=300)
+
+
+@pytest.fixture(scope='session')
+def app():
+    # app.py leaves app contexts pushed for its scripts (and its module-level app
+    # is current_app by then). Test requests would run inside those contexts and
+    # share g, and so the logged-in user, with the requests before them.
+    flask_app = app_ctx.app
+    while has_app_context():
+        app_ctx._get_current_object().pop()
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture(scope='session')
+def dataset(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        return seed_dataset(TEST_DATASET)
+
+
+@pytest.fixture(scope='session')
+def auth_headers(app, dataset):
+    """Authentication-Token headers for the seeded admin and first student."""
+    datastore = app.security.datastore
+    with app.app_context():
+        return {
+            'admin': {'Authentication-Token': datastore.find_user(id=dataset.admin_id).get_auth_token()},
+            'user': {'Authentication-Token': datastore.find_user(id=dataset.user_ids[0]).get_auth_token()},
+        }
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_statements(app):
+    """Call count_statements(fn) to get (fn's result, SQL statements it ran)."""
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+    def count(fn):
+        statements.clear()
+        result = fn()
+        return result, len(statements)
+
+    yield count
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def quiz_state_redis(app, monkeypatch):
+    """An empty in-process Redis standing in for QUIZ_STATE_REDIS_URL (drafts, queued submissions)."""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setitem(app.extensions, 'quiz_state_redis', client)
+    return client
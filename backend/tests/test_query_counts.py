@@ -0,0 +1,41 @@
+"""
+SQL statements per request on the list endpoints, against a small seeded
+dataset with a cold cache. A lazy load or an N+1 that creeps back in
+shows up here as a count over budget, or as a count that grows with the page.
+"""
+import pytest
+
+# (role, url, most statements one request may run)
+BUDGETS = [
+    ('admin', '/api/quiz-attempts?per_page=50', 3),
+    ('admin', '/api/quiz-attempts?cursor=&per_page=50', 2),
+    ('user', '/api/quiz-attempts?per_page=50', 3),
+    ('user', '/api/users/{user_id}/quiz-attempts?per_page=50', 3),
+    ('admin', '/api/subjects', 6),
+    ('user', '/api/quizzes/catalog?per_page=50', 3),
+    ('admin', '/api/quizzes/catalog?per_page=50', 3),
+]
+
+
+@pytest.mark.parametrize('role, url, budget', BUDGETS)
+def test_statement_budget(client, dataset, auth_headers, count_statements, role, url, budget):
+    url = url.format(user_id=dataset.user_ids[0])
+    response, statements = count_statements(lambda: client.get(url, headers=auth_headers[role]))
+
+    assert response.status_code in (200, 201)
+    assert statements <= budget, f'{url} ran {statements} SQL statements, budget is {budget}'
+
+
+@pytest.mark.parametrize('url, items', [
+    ('/api/quiz-attempts', 'attempts'),
+    ('/api/users/{user_id}/quiz-attempts', 'attempts'),
+    ('/api/quizzes/catalog', 'quizzes'),
+])
+def test_statements_do_not_grow_with_page_size(client, dataset, auth_headers, count_statements, url, items):
+    url = url.format(user_id=dataset.user_ids[0])
+    headers = auth_headers['user']
+    _, small_page = count_statements(lambda: client.get(f'{url}?per_page=2', headers=headers))
+    response, large_page = count_statements(lambda: client.get(f'{url}?per_page=50', headers=headers))
+
+    assert len(response.get_json()[items]) > 2
+    assert large_page == small_page
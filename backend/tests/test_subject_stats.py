@@ -0,0 +1,95 @@
+"""
+subject_attempt_stats is kept in step with quiz_attempts by every write that
+changes which attempts a subject has; it must always equal subject_totals_query().
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from application.data.aggregates import subject_totals_query
+from application.data.database import db
+from application.data.models import Chapter, Question, Quiz, Subject
+from application.data.subject_stats import stats_table
+
+
+def assert_stats_in_step(app):
+    with app.app_context():
+        stats = db.session.execute(select(stats_table).order_by(stats_table.c.subject_id)).all()
+        totals = db.session.execute(subject_totals_query().order_by(Chapter.subject_id)).all()
+    assert [tuple(row) for row in stats] == [pytest.approx(tuple(row)) for row in totals]
+
+
+def chapter_of(subject_id):
+    return db.session.scalars(select(Chapter.id).where(Chapter.subject_id == subject_id).order_by(Chapter.id)).first()
+
+
+@pytest.fixture
+def quiz(app, dataset, request):
+    """
+    A one-question quiz in a new subject of its own, so its attempts decide the
+    subject's top score. Returns (quiz_id, question_id).
+    """
+    with app.app_context():
+        subject = Subject(name=request.node.name)
+        chapter = Chapter(subject=subject, name='Stats')
+        quiz = Quiz(title='Stats', chapter=chapter, date_of_quiz=datetime(2026, 10, 19, 10, 0), time_duration=10)
+        question = Question(quiz=quiz, question_statement='2 + 2', option1='4', option2='5',
+                            option3='6', option4='7', correct_option=1)
+        db.session.add_all([subject, chapter, quiz, question])
+        db.session.commit()
+        return quiz.id, question.id
+
+
+@pytest.fixture
+def attempt(client, auth_headers):
+    """Submit an attempt at a quiz; returns the stored attempt's id."""
+    def attempt(quiz, correct=True):
+        quiz_id, question_id = quiz
+        response = client.post('/api/quiz-attempts', json={'quiz_id': quiz_id, 'answers': {str(question_id): 1 if correct else 2}},
+                               headers=auth_headers['user'])
+        assert response.status_code == 201
+        return response.get_json()['attempt']['id']
+    return attempt
+
+
+def test_stats_follow_new_attempts(app, quiz, attempt):
+    attempt(quiz, correct=False)
+    attempt(quiz)
+
+    assert_stats_in_step(app)
+
+
+def test_stats_follow_deleted_attempt(app, client, auth_headers, quiz, attempt):
+    attempt(quiz, correct=False)
+    # The subject's top score, so deleting it must look the top score up again
+    attempt_id = attempt(quiz)
+
+    response = client.delete(f'/api/quiz-attempts/{attempt_id}', headers=auth_headers['admin'])
+
+    assert response.status_code == 200
+    assert_stats_in_step(app)
+
+
+def test_stats_follow_quiz_moved_to_another_subject(app, client, auth_headers, dataset, quiz, attempt):
+    attempt(quiz)
+    attempt(quiz, correct=False)
+    with app.app_context():
+        chapter_id = chapter_of(dataset.subject_ids[1])
+
+    response = client.put(f'/api/quizzes/{quiz[0]}', headers=auth_headers['admin'], json={
+        'title': 'Stats', 'chapter_id': chapter_id, 'date_of_quiz': '2026-10-19T10:00', 'time_duration': 10
+    })
+
+    assert response.status_code == 200
+    assert_stats_in_step(app)
+
+
+def test_stats_follow_deleted_quiz(app, client, auth_headers, quiz, attempt):
+    attempt(quiz)
+    attempt(quiz, correct=False)
+
+    response = client.delete(f'/api/quizzes/{quiz[0]}', headers=auth_headers['admin'])
+
+    assert response.status_code == 200
+    assert_stats_in_step(app)
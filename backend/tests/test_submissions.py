@@ -0,0 +1,138 @@
+"""
+Write-behind submissions: POST /api/quiz-attempts queues the scored attempt in
+Redis and drain_submissions writes the queue to SQL.
+"""
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from application.data import submissions
+from application.data.database import db
+from application.data.models import QuizAttempt
+from application.data.submissions import (
+    LOCK_KEY,
+    SubmissionStoreUnavailable,
+    drain_submissions,
+    queue_length,
+)
+
+
+@pytest.fixture
+def write_behind(app, monkeypatch, quiz_state_redis):
+    monkeypatch.setitem(app.config, 'SUBMISSION_WRITE_BEHIND', True)
+    return quiz_state_redis
+
+
+@pytest.fixture
+def submit(client, dataset, auth_headers):
+    """Submit an attempt at the first seeded quiz; returns its submission_id."""
+    def submit():
+        response = client.post('/api/quiz-attempts', json={'quiz_id': dataset.quiz_ids[0], 'answers': {}},
+                               headers=auth_headers['user'])
+        assert response.status_code == 202
+        return response.get_json()['submission_id']
+    return submit
+
+
+def stored_attempt_ids(submission_id):
+    return db.session.scalars(select(QuizAttempt.id).where(QuizAttempt.submission_id == submission_id)).all()
+
+
+def test_drain_stores_batch_and_marks_it_stored(app, write_behind, submit):
+    submission_ids = [submit() for _ in range(3)]
+
+    with app.app_context():
+        assert queue_length() == 3
+        assert drain_submissions(10) == 3
+        assert queue_length() == 0
+
+        for submission_id in submission_ids:
+            status = write_behind.hgetall(f'submission:{submission_id}')
+            assert status['status'] == 'stored'
+            assert 'attempt' not in status
+            assert stored_attempt_ids(submission_id) == [int(status['attempt_id'])]
+            assert write_behind.ttl(f'submission:{submission_id}') > 0
+
+
+def test_queued_submission_does_not_expire(app, write_behind, submit):
+    submission_id = submit()
+
+    assert write_behind.ttl(f'submission:{submission_id}') == -1
+
+
+def test_drain_skips_submission_already_in_sql(app, write_behind, submit):
+    submission_id = submit()
+    key = f'submission:{submission_id}'
+    record = write_behind.hgetall(key)
+
+    with app.app_context():
+        drain_submissions(10)
+        attempt_id = write_behind.hget(key, 'attempt_id')
+
+        # As if a drain died after its commit, before it took the id off the queue
+        write_behind.hset(key, mapping=record)
+        write_behind.lpush(submissions.QUEUE_KEY, submission_id)
+        assert drain_submissions(10) == 1
+
+        assert write_behind.hget(key, 'status') == 'stored'
+        assert write_behind.hget(key, 'attempt_id') == attempt_id
+        assert stored_attempt_ids(submission_id) == [int(attempt_id)]
+
+
+def test_drain_keeps_batch_queued_while_database_is_unavailable(app, write_behind, submit, monkeypatch):
+    submission_ids = [submit() for _ in range(2)]
+
+    def unavailable(attempts):
+        raise OperationalError('INSERT INTO quiz_attempts', {}, Exception('database is locked'))
+
+    with app.app_context():
+        with monkeypatch.context() as patch, pytest.raises(SubmissionStoreUnavailable):
+            patch.setattr(submissions, '_write_attempts', unavailable)
+            drain_submissions(10)
+
+        assert queue_length() == 2
+        assert write_behind.get(LOCK_KEY) is None
+        for submission_id in submission_ids:
+            assert write_behind.hget(f'submission:{submission_id}', 'status') == 'queued'
+            assert write_behind.hexists(f'submission:{submission_id}', 'attempt')
+
+        assert drain_submissions(10) == 2
+        assert queue_length() == 0
+        for submission_id in submission_ids:
+            assert write_behind.hget(f'submission:{submission_id}', 'status') == 'stored'
+            assert len(stored_attempt_ids(submission_id)) == 1
+
+
+def test_drain_leaves_another_drains_lock(app, write_behind, submit):
+    submit()
+    write_behind.set(LOCK_KEY, 'another drain')
+
+    with app.app_context():
+        assert drain_submissions(10) == 0
+        assert queue_length() == 1
+    assert write_behind.get(LOCK_KEY) == 'another drain'
+
+
+def test_status_falls_back_to_sql(app, client, auth_headers, dataset, write_behind, submit):
+    submission_id = submit()
+    with app.app_context():
+        drain_submissions(10)
+        attempt_id = stored_attempt_ids(submission_id)[0]
+    # The Redis record has expired
+    write_behind.delete(f'submission:{submission_id}')
+
+    response = client.get(f'/api/quiz-attempts/submissions/{submission_id}', headers=auth_headers['user'])
+
+    assert response.status_code == 200
+    assert response.get_json() == {
+        'submission_id': submission_id,
+        'status': 'stored',
+        'user_id': dataset.user_ids[0],
+        'attempt_id': attempt_id,
+    }
+
+
+def test_status_of_unknown_submission_is_not_found(client, auth_headers, dataset, write_behind):
+    response = client.get('/api/quiz-attempts/submissions/0123456789abcdef', headers=auth_headers['user'])
+
+    assert response.status_code == 404
@@ -15,6 +15,7 @@ const store = createStore({
     chapters: [],
     quizzes: [],
     users: [],
+    usersPagination: { page: 1, per_page: 20, total: 0, pages: 0, has_next: false, has_prev: false },
     userAttempts: [],
     isModalVisible: false,
     newSubject: { name: '', description: '' },
@@ -66,6 +67,12 @@ const store = createStore({
     SET_USERS(state, users) {
       state.users = users;
     },
+    SET_USERS_PAGINATION(state, pagination) {
+      state.usersPagination = pagination;
+    },
+    UPDATE_USER(state, user) {
+      state.users = state.users.map((u) => (u.id === user.id ? user : u));
+    },
     SET_USER_ATTEMPTS(state, attempts) {
       state.userAttempts = attempts;
     },
@@ -199,7 +206,8 @@ const store = createStore({
         correct_option: 1,
       });
     },
-    async fetchUsers({ commit }) {
+    async fetchUsers({ commit }, params = {}) {
+      // One page of users, searched (q) and sorted by the server
       const token = localStorage.getItem('auth_token');
       if (!token) {
         console.error('Authentication token is missing');
@@ -209,11 +217,13 @@ const store = createStore({
       try {
         commit('SET_LOADING', true);
         const response = await axios.get('http://localhost:5000/api/users', {
+          params,
           headers: {
             'Authentication-Token': token,
           },
         });
-        commit('SET_USERS', response.data);
+        commit('SET_USERS', response.data.users);
+        commit('SET_USERS_PAGINATION', response.data.pagination);
       } catch (error) {
         console.error('Error fetching users:', error.response?.data?.message || error.message);
         commit('SET_USERS', []);
@@ -230,8 +240,7 @@ const store = createStore({
             'Authentication-Token': localStorage.getItem('auth_token'),
           },
         });
-        commit('SET_USERS', res.data.users);
-        console.log(res.data.users);
+        commit('UPDATE_USER', res.data.user);
 
         commit('SET_ERROR', null);
       } catch (error) {
@@ -301,6 +310,37 @@ const store = createStore({
         console.error('Error fetching quizzes:', error);
       }
     },
+    async fetchQuizCatalog({ commit }) {
+      // Quiz metadata and question counts only, page by page
+      try {
+        const quizzes = [];
+        let page = 1;
+        let hasNext = true;
+        while (hasNext) {
+          const response = await axios.get('http://localhost:5000/api/quizzes/catalog', {
+            params: { page, per_page: 100 },
+            headers: {
+              'Authentication-Token': localStorage.getItem('auth_token'),
+            },
+          });
+          quizzes.push(...response.data.quizzes);
+          hasNext = response.data.pagination.has_next;
+          page += 1;
+        }
+        commit('SET_QUIZZES', quizzes);
+      } catch (error) {
+        console.error('Error fetching quiz catalog:', error);
+      }
+    },
+    async fetchQuiz(_, quizId) {
+      // One quiz with its questions, when it is started
+      const response = await axios.get(`http://localhost:5000/api/quizzes/${quizId}`, {
+        headers: {
+          'Authentication-Token': localStorage.getItem('auth_token'),
+        },
+      });
+      return response.data;
+    },
     openModal({ commit }) {
       commit('SET_MODAL_VISIBLE', true);
     },
@@ -623,6 +663,9 @@ const store = createStore({
     users(state) {
       return state.users;
     },
+    usersPagination(state) {
+      return state.usersPagination;
+    },
     getSubjects(state) {
       return state.subjects;
     },